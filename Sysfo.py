@@ -3,10 +3,36 @@ import sys
 import os
 import subprocess
 import re
+import json
+import signal
+import struct
+import argparse
+import operator
+import queue
+import sqlite3
+import threading
+import urllib.request
+from array import array
+from collections import namedtuple
 from datetime import datetime, timedelta
+import fnmatch
+import functools
+import importlib
+import math
+import mmap
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from types import SimpleNamespace
 import psutil
 import time
 
+# NumPy solo hace falta para el comando 'query'; es opcional.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 def get_os_info():
     system = platform.system()
     
@@ -113,14 +139,27 @@ def get_gpu_info():
     return "\n  ".join(gpus) if gpus else "No se pudo detectar la GPU"
 # --- FIN DE LA FUNCIÓN MODIFICADA ---
 
-def get_memory_info():
-    mem = psutil.virtual_memory()
+def get_memory_info(snapshot=None):
+    # Con una instantánea del publicador compartido se usan sus datos en lugar de psutil
+    mem = SimpleNamespace(**snapshot['memory']) if snapshot else psutil.virtual_memory()
     total_gb = round(mem.total / (1024 ** 3), 2)
     available_gb = round(mem.available / (1024 ** 3), 2)
     used_percent = mem.percent
-    return f"{total_gb} GB totales, {available_gb} GB disponibles ({used_percent}% usado)"
+    info = f"{total_gb} GB totales, {available_gb} GB disponibles ({used_percent}% usado)"
+    # Si un cgroup limita la memoria por debajo del total del host, ese límite es el real
+    limits = get_cgroup_limits() if platform.system() == "Linux" else None
+    if limits and limits['memory_max'] is not None and limits['memory_max'] < mem.total:
+        used = limits['memory_current'] or 0
+        info += (f"\n  Límite del cgroup: {round(limits['memory_max'] / (1024 ** 3), 2)} GB, "
+                 f"{round((limits['memory_max'] - used) / (1024 ** 3), 2)} GB disponibles "
+                 f"({round(used * 100 / limits['memory_max'], 1)}% usado)")
+    return info
 
-def get_disk_info():
+def get_disk_info(snapshot=None):
+    if snapshot:
+        info = [f"{d['device']} ({d['mountpoint']}): {round(d['total'] / (1024**3), 2)} GB totales, "
+                f"{round(d['free'] / (1024**3), 2)} GB libres ({d['percent']}% usado)" for d in snapshot['disks']]
+        return "\n  ".join(info) if info else "Información no disponible"
     partitions = psutil.disk_partitions()
     info = []
     for partition in partitions:
@@ -172,7 +211,2227 @@ def get_system_temperature():
         return "No disponible (requiere OpenHardwareMonitor y la librería WMI)"
     return "No disponible"
 
-def main():
+# --- CGROUPS Y PRESIÓN DE RECURSOS (PSI) ---
+# Dentro de un contenedor psutil informa de los totales del host. Estas
+# funciones leen los límites de cgroup v2 y la presión de /proc/pressure.
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+PRESSURE_ROOT = '/proc/pressure'
+PRESSURE_RESOURCES = ('cpu', 'memory', 'io')
+
+def get_cgroup_mount(root=CGROUP_ROOT):
+    # En modo híbrido la jerarquía v2 está montada en /sys/fs/cgroup/unified
+    for candidate in (root, os.path.join(root, 'unified')):
+        if os.path.exists(os.path.join(candidate, 'cgroup.controllers')):
+            return candidate
+    return None
+
+def get_cgroup_path(root=CGROUP_ROOT, proc_cgroup='/proc/self/cgroup'):
+    """Devuelve el directorio del cgroup v2 del proceso actual o None."""
+    mount = get_cgroup_mount(root)
+    if mount is None:
+        return None
+    try:
+        with open(proc_cgroup) as f:
+            for line in f:
+                if line.startswith('0::'):
+                    path = os.path.normpath(os.path.join(mount, line[3:].strip().lstrip('/')))
+                    return path if os.path.isdir(path) else mount
+    except OSError:
+        pass
+    return mount
+
+def read_sysfs(*parts):
+    """Contenido sin espacios finales de un archivo de /sys o /proc; None si no se puede leer."""
+    try:
+        with open(os.path.join(*parts)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def parse_cpu_max(text):
+    """Convierte el contenido de cpu.max ('cuota periodo') en número de CPUs o None."""
+    if not text:
+        return None
+    parts = text.split()
+    if parts[0] == 'max':
+        return None
+    period = int(parts[1]) if len(parts) > 1 else 100000
+    return int(parts[0]) / period
+
+def parse_io_stat(text):
+    totals = {'rbytes': 0, 'wbytes': 0, 'rios': 0, 'wios': 0}
+    for line in (text or '').splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition('=')
+            if key in totals:
+                totals[key] += int(value)
+    return totals
+
+def get_cgroup_limits(root=CGROUP_ROOT, proc_cgroup='/proc/self/cgroup'):
+    """
+    Lee los límites efectivos del cgroup actual. Los límites de los cgroups
+    padre también se aplican, así que se recorre la jerarquía hasta la raíz
+    y se conserva el más restrictivo.
+    """
+    path = get_cgroup_path(root, proc_cgroup)
+    if path is None:
+        return None
+    mount = get_cgroup_mount(root)
+    # En hosts híbridos (v1 + v2) el controlador puede estar montado en v1 y
+    # no aparecer en cgroup.controllers; sin esa comprobación, "no hay
+    # cpu.max" se confundiría con "no hay cuota".
+    controllers = set((read_sysfs(path, 'cgroup.controllers') or '').split())
+    limits = {'path': path, 'controllers': controllers, 'cpu_limit': None, 'memory_max': None}
+    current = path
+    while True:
+        cpus = parse_cpu_max(read_sysfs(current, 'cpu.max')) if 'cpu' in controllers else None
+        if cpus is not None and (limits['cpu_limit'] is None or cpus < limits['cpu_limit']):
+            limits['cpu_limit'] = cpus
+        memory_max = read_sysfs(current, 'memory.max') if 'memory' in controllers else None
+        if memory_max and memory_max != 'max':
+            memory_max = int(memory_max)
+            if limits['memory_max'] is None or memory_max < limits['memory_max']:
+                limits['memory_max'] = memory_max
+        if os.path.normpath(current) == os.path.normpath(mount):
+            break
+        current = os.path.dirname(current)
+
+    memory_current = read_sysfs(path, 'memory.current') if 'memory' in controllers else None
+    limits['memory_current'] = int(memory_current) if memory_current else None
+    limits['io'] = parse_io_stat(read_sysfs(path, 'io.stat') if 'io' in controllers else None)
+    return limits
+
+def get_effective_cpus(limits=None):
+    """CPUs utilizables: el menor entre la afinidad del proceso y la cuota del cgroup."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = psutil.cpu_count(logical=True)
+    if limits and limits.get('cpu_limit') is not None:
+        return min(cpus, limits['cpu_limit'])
+    return cpus
+
+def parse_pressure(text):
+    """Convierte un archivo de presión ('some avg10=... total=...') en diccionario."""
+    pressure = {}
+    for line in (text or '').splitlines():
+        kind, *fields = line.split()
+        pressure[kind] = {key: float(value) for key, _, value in (f.partition('=') for f in fields)}
+    return pressure
+
+def get_pressure(path=PRESSURE_ROOT, suffix=''):
+    """
+    Lee la presión de CPU, memoria y E/S: del sistema en /proc/pressure o de un
+    cgroup pasando su directorio y suffix='.pressure'.
+    """
+    pressure = {}
+    for resource in PRESSURE_RESOURCES:
+        text = read_sysfs(path, resource + suffix)
+        if text:
+            pressure[resource] = parse_pressure(text)
+    return pressure
+
+def get_container_info(root=CGROUP_ROOT, proc_cgroup='/proc/self/cgroup'):
+    limits = get_cgroup_limits(root, proc_cgroup)
+    if limits is None:
+        return "cgroup v2 no disponible"
+    host_cpus = psutil.cpu_count(logical=True)
+    info = [f"cgroup: {limits['path']}"]
+    controllers = limits['controllers']
+    if 'cpu' not in controllers:
+        info.append(f"CPUs efectivas: {get_effective_cpus(limits)} (controlador no disponible en cgroup v2)")
+    elif limits['cpu_limit'] is not None:
+        info.append(f"CPUs efectivas: {round(get_effective_cpus(limits), 2)} (de {host_cpus} del host)")
+    else:
+        info.append(f"CPUs efectivas: {get_effective_cpus(limits)} (sin cuota de CPU)")
+    if 'memory' not in controllers:
+        info.append("Memoria: controlador no disponible en cgroup v2")
+    elif limits['memory_max'] is not None:
+        used = limits['memory_current'] or 0
+        info.append(f"Memoria: {round(used / (1024 ** 3), 2)} GB usados de {round(limits['memory_max'] / (1024 ** 3), 2)} GB "
+                    f"de límite ({round(used * 100 / limits['memory_max'], 1)}% usado)")
+    else:
+        info.append("Memoria: sin límite en el cgroup")
+    io = limits['io']
+    if 'io' not in controllers:
+        info.append("E/S: controlador no disponible en cgroup v2")
+    elif io['rbytes'] or io['wbytes']:
+        info.append(f"E/S: {round(io['rbytes'] / (1024 ** 2), 1)} MB leídos, {round(io['wbytes'] / (1024 ** 2), 1)} MB escritos")
+    return "\n  ".join(info)
+
+def format_pressure(pressure):
+    lines = []
+    for resource, kinds in pressure.items():
+        parts = [f"{kind} {values.get('avg10', 0)}% / {values.get('avg60', 0)}% / {values.get('avg300', 0)}%"
+                 for kind, values in kinds.items()]
+        lines.append(f"{resource}: " + ", ".join(parts))
+    return lines
+
+def get_pressure_info(root=CGROUP_ROOT, proc_cgroup='/proc/self/cgroup'):
+    lines = [f"Sistema  {line}" for line in format_pressure(get_pressure())]
+    path = get_cgroup_path(root, proc_cgroup)
+    if path:
+        lines += [f"cgroup   {line}" for line in format_pressure(get_pressure(path, '.pressure'))]
+    if not lines:
+        return "No disponible (requiere Linux 4.20 o superior con PSI activado)"
+    return "Tiempo bloqueado (avg10 / avg60 / avg300):\n  " + "\n  ".join(lines)
+
+# --- TOPOLOGÍA DE CPU ---
+# Sockets -> nodos NUMA -> núcleos -> hilos (SMT), con las cachés y la memoria
+# de cada nodo. La topología no cambia mientras el sistema está encendido, así
+# que se lee una sola vez; solo la memoria libre por nodo se consulta cada vez.
+
+SYSFS_SYSTEM = '/sys/devices/system'
+
+def parse_cpu_list(text):
+    """Convierte una lista de CPUs del kernel ('0-3,8,10-11') en una lista de enteros."""
+    cpus = []
+    for part in (text or '').strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+def format_cpu_list(cpus):
+    """Operación inversa de parse_cpu_list: [0, 1, 2, 3, 8] -> '0-3,8'."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def parse_cache_size(text):
+    """'48K' -> 48, '2M' -> 2048 (en KB)."""
+    match = re.match(r"^\s*(\d+)\s*([KMG]?)", text or '')
+    if not match:
+        return None
+    return int(match.group(1)) * {'': 1, 'K': 1, 'M': 1024, 'G': 1024 ** 2}[match.group(2)]
+
+def get_numa_memory(root=SYSFS_SYSTEM):
+    """Devuelve {nodo: {'total': bytes, 'free': bytes}} leyendo node*/meminfo."""
+    memory = {}
+    node_dir = os.path.join(root, 'node')
+    try:
+        names = os.listdir(node_dir)
+    except OSError:
+        return memory
+    for name in names:
+        if not re.match(r"^node\d+$", name):
+            continue
+        node = int(name[4:])
+        info = {}
+        for line in (read_sysfs(os.path.join(node_dir, name, 'meminfo')) or '').splitlines():
+            match = re.match(r"^Node \d+ (MemTotal|MemFree):\s+(\d+) kB", line)
+            if match:
+                info[match.group(1)] = int(match.group(2)) * 1024
+        memory[node] = {'total': info.get('MemTotal'), 'free': info.get('MemFree')}
+    return memory
+
+@functools.lru_cache(maxsize=None)
+def get_cpu_topology(root=SYSFS_SYSTEM):
+    """
+    Construye la topología a partir de /sys/devices/system. Devuelve None si no
+    está disponible (por ejemplo, fuera de Linux).
+    """
+    cpu_dir = os.path.join(root, 'cpu')
+    online = read_sysfs(os.path.join(cpu_dir, 'online'))
+    if online is None:
+        return None
+
+    # CPU -> nodo NUMA; sin NUMA todo pertenece al nodo 0
+    cpu_node = {}
+    memory = get_numa_memory(root)
+    for node in memory:
+        for cpu in parse_cpu_list(read_sysfs(os.path.join(root, 'node', f'node{node}', 'cpulist'))):
+            cpu_node[cpu] = node
+
+    sockets = {}
+    caches = {}
+    for cpu in parse_cpu_list(online):
+        topology = os.path.join(cpu_dir, f'cpu{cpu}', 'topology')
+        socket = int(read_sysfs(os.path.join(topology, 'physical_package_id')) or 0)
+        core = int(read_sysfs(os.path.join(topology, 'core_id')) or cpu)
+        siblings = parse_cpu_list(read_sysfs(os.path.join(topology, 'thread_siblings_list')) or str(cpu))
+        node = cpu_node.get(cpu, 0)
+        nodes = sockets.setdefault(socket, {})
+        cores = nodes.setdefault(node, {})
+        cores[core] = sorted(set(cores.get(core, [])) | set(siblings))
+
+        cache_dir = os.path.join(cpu_dir, f'cpu{cpu}', 'cache')
+        try:
+            indexes = [name for name in os.listdir(cache_dir) if name.startswith('index')]
+        except OSError:
+            indexes = []
+        for index in indexes:
+            base = os.path.join(cache_dir, index)
+            shared = tuple(parse_cpu_list(read_sysfs(os.path.join(base, 'shared_cpu_list')) or str(cpu)))
+            level = int(read_sysfs(os.path.join(base, 'level')) or 0)
+            kind = read_sysfs(os.path.join(base, 'type')) or 'Unified'
+            # Cada caché física aparece una vez por CPU que la comparte
+            caches[(level, kind, shared)] = parse_cache_size(read_sysfs(os.path.join(base, 'size')))
+
+    return {
+        'sockets': [
+            {'id': socket, 'nodes': [
+                {'id': node,
+                 'cpus': sorted(cpu for siblings in cores.values() for cpu in siblings),
+                 'memory_total': memory.get(node, {}).get('total'),
+                 'cores': [{'id': core, 'cpus': siblings} for core, siblings in sorted(cores.items())]}
+                for node, cores in sorted(nodes.items())]}
+            for socket, nodes in sorted(sockets.items())
+        ],
+        'caches': [
+            {'level': level, 'type': kind, 'size_kb': size, 'shared_cpus': list(shared)}
+            for (level, kind, shared), size in sorted(caches.items())
+        ],
+    }
+
+def cache_label(cache):
+    suffix = {'Data': 'd', 'Instruction': 'i'}.get(cache['type'], '')
+    return f"L{cache['level']}{suffix}"
+
+def format_cache_size(size_kb):
+    if size_kb is None:
+        return "?"
+    return f"{round(size_kb / 1024, 2):g} MB" if size_kb >= 1024 else f"{size_kb} KB"
+
+def summarize_caches(caches, cpus):
+    """Resume las cachés de un conjunto de CPUs: 'L1d 48 KB ×8 · L3 30 MB ×1'."""
+    cpus = set(cpus)
+    groups = {}
+    for cache in caches:
+        if cpus & set(cache['shared_cpus']):
+            key = (cache['level'], cache_label(cache), cache['size_kb'])
+            groups[key] = groups.get(key, 0) + 1
+    return " · ".join(f"{label} {format_cache_size(size)} ×{count}"
+                      for (level, label, size), count in sorted(groups.items()))
+
+def format_topology_tree(topology, memory=None, detail=False):
+    """Árbol compacto en texto; con detail=True se lista cada núcleo y sus hilos."""
+    if topology is None:
+        return "No disponible"
+    memory = memory or {}
+    lines = []
+    for socket in topology['sockets']:
+        lines.append(f"Socket {socket['id']}")
+        for node in socket['nodes']:
+            node_memory = memory.get(node['id'], {})
+            total = node_memory.get('total') or node['memory_total']
+            mem_text = ""
+            if total:
+                mem_text = f", {round(total / (1024 ** 3), 2)} GB"
+                if node_memory.get('free') is not None:
+                    mem_text += f" ({round(node_memory['free'] / (1024 ** 3), 2)} GB libres)"
+            lines.append(f"  Nodo NUMA {node['id']}: CPUs {format_cpu_list(node['cpus'])}{mem_text}")
+            threads = {len(core['cpus']) for core in node['cores']}
+            per_core = "/".join(str(t) for t in sorted(threads))
+            lines.append(f"    {len(node['cores'])} núcleos, {per_core} hilo(s) por núcleo")
+            caches = summarize_caches(topology['caches'], node['cpus'])
+            if caches:
+                lines.append(f"    Cachés: {caches}")
+            if detail:
+                for core in node['cores']:
+                    lines.append(f"    Núcleo {core['id']}: CPUs {format_cpu_list(core['cpus'])}")
+    return "\n  ".join(lines)
+
+def run_topology(args):
+    topology = get_cpu_topology()
+    memory = get_numa_memory()
+    if args.format == 'json':
+        if topology is not None:
+            topology = dict(topology, memory={str(node): values for node, values in memory.items()})
+        print(json.dumps(topology, indent=2, ensure_ascii=False))
+    else:
+        print("  " + format_topology_tree(topology, memory, args.detail))
+
+# --- COLECTORES EXTERNOS (PLUGINS) ---
+# Otros paquetes pueden añadir colectores propios (controladoras RAID, IPMI,
+# métricas de aplicaciones...) declarando un CollectorSpec en el grupo de
+# entry points 'sysfo.collectors'. El spec es ligero: 'target' indica con
+# 'módulo:función' dónde está el colector, y ese módulo solo se importa
+# cuando el colector está activado, es de esta plataforma y le toca ejecutarse.
+#
+#   [project.entry-points."sysfo.collectors"]
+#   raid = "mi_paquete.sysfo_specs:RAID"
+#
+#   RAID = CollectorSpec(name='raid', target='mi_paquete.raid:collect', title='RAID',
+#                        platforms=('Linux',), tier='slow', cost='moderate',
+#                        schema={'degraded_arrays': 'int', 'status': 'str'})
+
+PLUGIN_GROUP = 'sysfo.collectors'
+PLUGIN_ENV = 'SYSFO_PLUGINS'  # Lista separada por comas, 'all' o 'none'
+
+# Cada cuánto se ejecuta un colector según su nivel; 'static' solo una vez
+TIER_INTERVALS = {'static': None, 'slow': 300, 'normal': 30, 'fast': 0}
+# Los colectores 'expensive' solo se ejecutan si se activan explícitamente
+COST_CLASSES = ('cheap', 'moderate', 'expensive')
+SCHEMA_TYPES = {'float': (int, float), 'int': (int,), 'str': (str,), 'bool': (bool,)}
+
+CollectorSpec = namedtuple('CollectorSpec', 'name target title platforms tier cost schema')
+CollectorSpec.__new__.__defaults__ = (None, (), 'normal', 'cheap', None)
+
+class CollectorRegistry:
+    """
+    Registro de colectores externos. discover() solo carga los specs; cada
+    colector se importa la primera vez que collect() decide ejecutarlo y su
+    resultado se reutiliza hasta que vuelva a tocarle según su nivel.
+    """
+
+    def __init__(self, enabled=None):
+        # enabled: None = los que no son 'expensive'; o un conjunto de nombres; 'all'
+        self.enabled = enabled
+        self.specs = {}
+        self.errors = {}
+        self._functions = {}
+        self._results = {}   # nombre -> (instante, resultado)
+
+    def register(self, spec):
+        if spec.tier not in TIER_INTERVALS:
+            raise ValueError(f"Nivel de refresco desconocido en '{spec.name}': {spec.tier}")
+        if spec.cost not in COST_CLASSES:
+            raise ValueError(f"Clase de coste desconocida en '{spec.name}': {spec.cost}")
+        self.specs[spec.name] = spec
+
+    def discover(self):
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:
+            return self
+        try:
+            points = entry_points(group=PLUGIN_GROUP)
+        except TypeError:
+            points = entry_points().get(PLUGIN_GROUP, []) # Python 3.8 y 3.9
+        for point in points:
+            try:
+                self.register(point.load())
+            except Exception as e:
+                self.errors[point.name] = f"spec no válido: {e}"
+        return self
+
+    def is_enabled(self, spec):
+        if spec.platforms and platform.system() not in spec.platforms:
+            return False
+        if self.enabled == 'all':
+            return True
+        if self.enabled is None:
+            return spec.cost != 'expensive'
+        return spec.name in self.enabled
+
+    def enabled_specs(self):
+        return [spec for spec in self.specs.values() if self.is_enabled(spec)]
+
+    def is_due(self, spec, now):
+        if spec.name not in self._results:
+            return True
+        interval = TIER_INTERVALS[spec.tier]
+        return interval is not None and now - self._results[spec.name][0] >= interval
+
+    def is_loaded(self, spec):
+        return spec.name in self._functions
+
+    def _load(self, spec):
+        function = self._functions.get(spec.name)
+        if function is None:
+            module_name, _, attribute = spec.target.partition(':')
+            function = getattr(importlib.import_module(module_name), attribute)
+            self._functions[spec.name] = function
+        return function
+
+    def validate(self, spec, result):
+        """Conserva solo los campos declarados en el esquema y con el tipo correcto."""
+        if not isinstance(result, dict):
+            raise TypeError("el colector debe devolver un diccionario")
+        if spec.schema is None:
+            return result
+        clean = {}
+        for field, kind in spec.schema.items():
+            value = result.get(field)
+            if isinstance(value, SCHEMA_TYPES[kind]) and not (kind != 'bool' and isinstance(value, bool)):
+                clean[field] = value
+        return clean
+
+    def collect(self, now=None):
+        """Ejecuta los colectores activados a los que les toca y devuelve {nombre: resultado}."""
+        now = time.time() if now is None else now
+        results = {}
+        for spec in self.enabled_specs():
+            if self.is_due(spec, now):
+                try:
+                    result = self.validate(spec, self._load(spec)())
+                    self.errors.pop(spec.name, None)
+                except Exception as e:
+                    self.errors[spec.name] = str(e)
+                    result = {}
+                self._results[spec.name] = (now, result)
+            results[spec.name] = self._results[spec.name][1]
+        return results
+
+    def sample_fields(self, now=None):
+        """Campos numéricos como métricas 'plugin.nombre.campo' para muestras e historial."""
+        fields = {}
+        for name, result in self.collect(now).items():
+            for field, value in result.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    fields[f'plugin.{name}.{field}'] = value
+        return fields
+
+_collector_registry = None
+
+def get_collector_registry():
+    """Registro compartido, creado la primera vez que se necesita."""
+    global _collector_registry
+    if _collector_registry is None:
+        setting = os.environ.get(PLUGIN_ENV, '').strip()
+        if setting == 'all':
+            enabled = 'all'
+        elif setting == 'none':
+            enabled = set()
+        elif setting:
+            enabled = {name.strip() for name in setting.split(',')}
+        else:
+            enabled = None
+        _collector_registry = CollectorRegistry(enabled).discover()
+    return _collector_registry
+
+def format_plugin_result(result):
+    return "\n  ".join(f"{field}: {value}" for field, value in result.items()) if result else "Sin datos"
+
+def run_plugins(args):
+    registry = get_collector_registry()
+    if not registry.specs and not registry.errors:
+        print(f"No hay colectores registrados en el grupo '{PLUGIN_GROUP}'")
+        return
+    results = registry.collect() if args.run else {}
+    for spec in registry.specs.values():
+        state = "activado" if registry.is_enabled(spec) else "desactivado"
+        platforms = ", ".join(spec.platforms) or "todas"
+        print(f"{spec.name}: {spec.title or spec.name} [{state}] plataforma: {platforms}, "
+              f"nivel: {spec.tier}, coste: {spec.cost}")
+        if spec.name in results:
+            print("  " + format_plugin_result(results[spec.name]))
+    for name, error in registry.errors.items():
+        print(f"{name}: error: {error}")
+
+# --- ENERGÍA ---
+# Potencia y batería a partir de /sys/class/power_supply y de los contadores
+# RAPL de /sys/class/powercap. Los contadores de energía son acumulados, así
+# que la potencia se calcula con la diferencia entre dos lecturas (teniendo en
+# cuenta que el contador vuelve a cero al llegar a max_energy_range_uj).
+
+POWER_SUPPLY_ROOT = '/sys/class/power_supply'
+POWERCAP_ROOT = '/sys/class/powercap'
+POWER_SMOOTHING_SECONDS = 10  # Constante de tiempo de la media exponencial
+# El controlador de la batería refresca energy_now cada pocos segundos; entre
+# dos lecturas más próximas la diferencia suele ser cero y daría 0 W
+POWER_SUPPLY_MIN_INTERVAL = 5
+
+def _read_number(path):
+    text = read_sysfs(path)
+    try:
+        return int(text) if text is not None else None
+    except ValueError:
+        return None
+
+def read_batteries(root=POWER_SUPPLY_ROOT):
+    """Lee las baterías en unidades del kernel (µWh, µW, µAh, µA, µV)."""
+    batteries = []
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return batteries
+    for name in names:
+        base = os.path.join(root, name)
+        if read_sysfs(os.path.join(base, 'type')) != 'Battery':
+            continue
+        battery = {'name': name, 'status': read_sysfs(os.path.join(base, 'status'))}
+        for field in ('capacity', 'cycle_count', 'energy_now', 'energy_full', 'energy_full_design', 'power_now',
+                      'charge_now', 'charge_full', 'charge_full_design', 'current_now', 'voltage_now'):
+            battery[field] = _read_number(os.path.join(base, field))
+        # Algunas baterías solo informan de carga (µAh) y corriente: se pasan a energía y potencia
+        voltage = battery['voltage_now']
+        if voltage:
+            for energy, charge in (('energy_now', 'charge_now'), ('energy_full', 'charge_full'),
+                                   ('energy_full_design', 'charge_full_design')):
+                if battery[energy] is None and battery[charge] is not None:
+                    battery[energy] = battery[charge] * voltage // 10 ** 6
+            if battery['power_now'] is None and battery['current_now'] is not None:
+                battery['power_now'] = abs(battery['current_now']) * voltage // 10 ** 6
+        batteries.append(battery)
+    return batteries
+
+def read_rapl_domains(root=POWERCAP_ROOT):
+    """Devuelve {nombre: (energía µJ, rango máximo µJ)} de cada dominio RAPL."""
+    domains = {}
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return domains
+    for entry in names:
+        if not entry.startswith(('intel-rapl:', 'amd-rapl:')):
+            continue
+        base = os.path.join(root, entry)
+        energy = _read_number(os.path.join(base, 'energy_uj'))
+        if energy is None:
+            continue # Sin permiso de lectura (desde Linux 5.10 solo root puede leerlo)
+        name = read_sysfs(os.path.join(base, 'name')) or entry
+        # Los subdominios (core, uncore, dram) llevan el índice del paquete delante
+        parts = entry.split(':')
+        if len(parts) > 2 or name in domains:
+            name = f"{name}:{parts[1]}" if len(parts) > 2 else f"{name}:{entry}"
+        domains[name] = (energy, _read_number(os.path.join(base, 'max_energy_range_uj')))
+    return domains
+
+def energy_delta(previous, current, max_range):
+    """Diferencia de un contador acumulado que vuelve a cero al superar max_range."""
+    if current >= previous:
+        return current - previous
+    if not max_range:
+        return None
+    return current + (max_range - previous) + 1
+
+class PowerMonitor:
+    """
+    Calcula la potencia suavizada de cada dominio RAPL y de la batería a partir
+    de lecturas consecutivas. Cada llamada a sample() devuelve métricas para
+    collect_sample(): 'power_watts:<dominio>', 'battery_watts',
+    'battery_drain_percent_per_hour', etc.
+    """
+
+    def __init__(self, supply_root=POWER_SUPPLY_ROOT, powercap_root=POWERCAP_ROOT):
+        self.supply_root = supply_root
+        self.powercap_root = powercap_root
+        self.previous_rapl = {}
+        self.previous_battery = {}
+        self.previous_time = None
+        self.smoothed = {}
+        self.previous_self_cpu = None
+        self.batteries = []  # Última lectura, para mostrarla sin volver a leer sysfs
+
+    def smooth(self, key, value, dt):
+        if value is None:
+            return None
+        previous = self.smoothed.get(key)
+        if previous is None or dt is None:
+            self.smoothed[key] = value
+        else:
+            alpha = 1 - math.exp(-dt / POWER_SMOOTHING_SECONDS)
+            self.smoothed[key] = previous + alpha * (value - previous)
+        return self.smoothed[key]
+
+    def sample(self, now=None):
+        now = time.time() if now is None else now
+        dt = now - self.previous_time if self.previous_time is not None else None
+        metrics = {}
+
+        rapl = read_rapl_domains(self.powercap_root)
+        for name, (energy, max_range) in rapl.items():
+            previous = self.previous_rapl.get(name)
+            if previous is not None and dt and dt > 0:
+                delta = energy_delta(previous, energy, max_range)
+                if delta is not None:
+                    watts = self.smooth(f'rapl:{name}', delta / dt / 10 ** 6, dt)
+                    metrics[f'power_watts:{name}'] = round(watts, 3)
+        self.previous_rapl = {name: energy for name, (energy, _) in rapl.items()}
+        packages = [v for k, v in metrics.items() if k.startswith('power_watts:package')]
+        if packages:
+            metrics['power_package_watts'] = round(sum(packages), 3)
+
+        self.batteries = read_batteries(self.supply_root)
+        for battery in self.batteries:
+            prefix = battery['name']
+            # Potencia: power_now si existe; si no, variación de energy_now desde
+            # una lectura de hace al menos POWER_SUPPLY_MIN_INTERVAL segundos
+            watts = battery['power_now'] / 10 ** 6 if battery['power_now'] is not None else None
+            previous = self.previous_battery.get(prefix)
+            if watts is None and battery['energy_now'] is not None:
+                if previous is None or previous[0] is None:
+                    self.previous_battery[prefix] = (battery['energy_now'], now)
+                elif now - previous[1] >= POWER_SUPPLY_MIN_INTERVAL:
+                    watts = abs(previous[0] - battery['energy_now']) / 10 ** 6 / ((now - previous[1]) / 3600)
+                    self.previous_battery[prefix] = (battery['energy_now'], now)
+            watts = self.smooth(f'battery:{prefix}', watts, dt)
+            discharging = battery['status'] == 'Discharging'
+
+            if battery['capacity'] is not None:
+                metrics[f'battery_percent:{prefix}'] = battery['capacity']
+            if battery['cycle_count']:
+                metrics[f'battery_cycles:{prefix}'] = battery['cycle_count']
+            if battery['energy_full'] and battery['energy_full_design']:
+                metrics[f'battery_health_percent:{prefix}'] = round(
+                    battery['energy_full'] * 100 / battery['energy_full_design'], 1)
+            if watts is not None:
+                metrics[f'battery_watts:{prefix}'] = round(watts if discharging else -watts, 3)
+                if discharging and battery['energy_full']:
+                    # µWh por hora al ritmo actual, expresado en % de la capacidad real
+                    metrics[f'battery_drain_percent_per_hour:{prefix}'] = round(
+                        watts * 10 ** 6 * 100 / battery['energy_full'], 2)
+
+        # Estimación del consumo del propio proceso: su parte del tiempo de CPU
+        # ocupado aplicada a la potencia del paquete
+        self_cpu = sum(psutil.Process().cpu_times()[:2])
+        times = psutil.cpu_times()
+        busy = sum(times) - times.idle - getattr(times, 'iowait', 0)
+        if self.previous_self_cpu is not None and 'power_package_watts' in metrics:
+            own, total = self_cpu - self.previous_self_cpu[0], busy - self.previous_self_cpu[1]
+            if total > 0:
+                metrics['power_self_watts'] = round(metrics['power_package_watts'] * min(own / total, 1.0), 3)
+        self.previous_self_cpu = (self_cpu, busy)
+
+        self.previous_time = now
+        return metrics
+
+_power_monitor = None
+
+def get_power_monitor():
+    global _power_monitor
+    if _power_monitor is None:
+        _power_monitor = PowerMonitor()
+    return _power_monitor
+
+def format_power_info(metrics, batteries):
+    lines = []
+    for key, value in metrics.items():
+        if key.startswith('power_watts:'):
+            lines.append(f"RAPL {key.split(':', 1)[1]}: {value:.2f} W")
+    if 'power_self_watts' in metrics:
+        lines.append(f"Consumo estimado de Sysfo: {metrics['power_self_watts']:.3f} W")
+    for battery in batteries:
+        name = battery['name']
+        parts = [f"Batería {name}: {battery['capacity']}% ({battery['status']})"]
+        if f'battery_watts:{name}' in metrics:
+            parts.append(f"{abs(metrics[f'battery_watts:{name}']):.2f} W")
+        if f'battery_drain_percent_per_hour:{name}' in metrics:
+            parts.append(f"descarga {metrics[f'battery_drain_percent_per_hour:{name}']:.1f} %/h")
+        if f'battery_health_percent:{name}' in metrics:
+            parts.append(f"salud {metrics[f'battery_health_percent:{name}']}%")
+        if battery['cycle_count']:
+            parts.append(f"{battery['cycle_count']} ciclos")
+        lines.append(", ".join(parts))
+    return "\n  ".join(lines) if lines else "No disponible (sin batería ni contadores RAPL legibles)"
+
+def get_power_info(interval=0.5):
+    """
+    Para el reporte: dos lecturas separadas por 'interval' segundos. La espera
+    solo sirve para RAPL; la batería sin power_now necesita más tiempo
+    (POWER_SUPPLY_MIN_INTERVAL) y en ese caso se omiten sus vatios y descarga.
+    """
+    monitor = PowerMonitor()
+    monitor.sample()
+    if read_rapl_domains():
+        time.sleep(interval)
+    return format_power_info(monitor.sample(), read_batteries())
+
+# --- MUESTRAS NUMÉRICAS ---
+# Las funciones get_*_info devuelven texto para mostrarlo; collect_sample()
+# reúne los mismos datos como números para alertas e historial.
+
+# Sensores que miden la temperatura del propio procesador; el resto (NVMe,
+# GPU, acpitz, wifi...) se guardan como 'temp:*' pero no cuentan como 'cpu_temp'
+CPU_SENSOR_CHIPS = ('coretemp', 'k10temp', 'zenpower', 'x86_pkg_temp')
+
+def get_cpu_temperature(readings):
+    """Máximo de los sensores de CPU de get_temperature_readings(), o None."""
+    cpu = [value for name, value in readings.items() if name.split('.')[0] in CPU_SENSOR_CHIPS]
+    return max(cpu) if cpu else None
+
+# Etiquetas de los sensores que miden el paquete completo y no un núcleo
+CPU_PACKAGE_LABELS = ('Package id', 'Tctl', 'Tdie')
+
+def get_cpu_package_temperature(readings):
+    """Máximo de los sensores de paquete (coretemp 'Package id N', k10temp 'Tctl'...), o None."""
+    package = [value for name, value in readings.items()
+               if name.split('.')[0] == 'x86_pkg_temp'
+               or (name.split('.')[0] in CPU_SENSOR_CHIPS and name.split('.', 1)[-1].startswith(CPU_PACKAGE_LABELS))]
+    return max(package) if package else None
+
+def get_core_temperatures(readings, topology):
+    """
+    {CPU lógica: °C} a partir de los sensores 'coretemp.Core N', que se
+    refieren al core_id físico: todas las CPUs lógicas del núcleo comparten
+    la lectura. Con AMD solo hay sensores por paquete o CCD y queda vacío.
+    """
+    temperatures = {}
+    if topology is None:
+        return temperatures
+    for socket in topology['sockets']:
+        for node in socket['nodes']:
+            for core in node['cores']:
+                value = readings.get(f"coretemp.Core {core['id']}")
+                if value is not None:
+                    temperatures.update({cpu: value for cpu in core['cpus']})
+    return temperatures
+
+def get_temperature_readings():
+    """Devuelve un diccionario {chip.sensor: °C} con las temperaturas disponibles."""
+    readings = {}
+    if hasattr(psutil, "sensors_temperatures"):
+        try:
+            for chip, entries in psutil.sensors_temperatures().items():
+                for i, entry in enumerate(entries):
+                    if entry.current:
+                        readings[f"{chip}.{entry.label or i}"] = entry.current
+        except Exception:
+            pass
+    if not readings and platform.system() == "Linux":
+        try:
+            for sensor in os.listdir('/sys/class/thermal'):
+                if sensor.startswith('thermal_zone'):
+                    try:
+                        with open(f'/sys/class/thermal/{sensor}/temp') as f:
+                            temp = int(f.read()) / 1000
+                        # El tipo de zona ('x86_pkg_temp', 'acpitz'...) hace de chip
+                        with open(f'/sys/class/thermal/{sensor}/type') as f:
+                            kind = f.read().strip()
+                        readings[f"{kind}.{sensor}"] = temp
+                    except:
+                        continue
+        except:
+            pass
+    return readings
+
+# Imágenes de solo lectura (snaps, ISOs...): siempre están al 100%, así que
+# no generan series de uso de disco ni disparan alertas
+READONLY_FILESYSTEMS = {'squashfs', 'iso9660', 'erofs', 'cramfs'}
+
+def tracks_disk_usage(fstype, opts):
+    return fstype.lower() not in READONLY_FILESYSTEMS and 'ro' not in opts.split(',')
+
+def collect_sample():
+    """
+    Toma una muestra de todas las métricas como un diccionario plano de números.
+    Las métricas con varias series usan el formato 'métrica:serie'
+    (por ejemplo 'disk_percent:/home' o 'cpu_core:3').
+    """
+    mem = psutil.virtual_memory()
+    sample = {
+        'time': time.time(),
+        'cpu_percent': psutil.cpu_percent(),
+        'mem_percent': mem.percent,
+        'mem_available_gb': round(mem.available / (1024 ** 3), 3),
+    }
+    for i, usage in enumerate(psutil.cpu_percent(percpu=True)):
+        sample[f'cpu_core:{i}'] = usage
+
+    temps = get_temperature_readings()
+    for name, value in temps.items():
+        sample[f'temp:{name}'] = value
+    cpu_temp = get_cpu_temperature(temps)
+    if cpu_temp is not None:
+        sample['cpu_temp'] = cpu_temp
+
+    for partition in psutil.disk_partitions():
+        if not tracks_disk_usage(partition.fstype, partition.opts):
+            continue
+        try:
+            usage = psutil.disk_usage(partition.mountpoint)
+        except:
+            continue
+        sample[f'disk_percent:{partition.mountpoint}'] = usage.percent
+        sample[f'disk_free_gb:{partition.mountpoint}'] = round(usage.free / (1024 ** 3), 3)
+
+    net = psutil.net_io_counters()
+    if net:
+        sample['net_bytes_sent'] = net.bytes_sent
+        sample['net_bytes_recv'] = net.bytes_recv
+    disk_io = psutil.disk_io_counters()
+    if disk_io:
+        sample['disk_read_bytes'] = disk_io.read_bytes
+        sample['disk_write_bytes'] = disk_io.write_bytes
+
+    # Presión (avg10) del sistema y uso de memoria respecto al límite del cgroup
+    for resource, kinds in get_pressure().items():
+        for kind, values in kinds.items():
+            sample[f'psi_{resource}_{kind}'] = values.get('avg10', 0.0)
+    limits = get_cgroup_limits() if platform.system() == "Linux" else None
+    if limits and limits['memory_max'] and limits['memory_current'] is not None:
+        sample['cgroup_mem_percent'] = round(limits['memory_current'] * 100 / limits['memory_max'], 2)
+
+    if platform.system() == "Linux":
+        sample.update(get_power_monitor().sample(sample['time']))
+    sample.update(get_collector_registry().sample_fields(sample['time']))
+    return sample
+
+# --- INSTANTÁNEA COMPARTIDA ---
+# 'sysfo publish' recoge los datos una sola vez y los publica en memoria
+# compartida. Cualquier proceso local (el reporte, la GUI, scripts propios)
+# puede leer la última instantánea sin volver a consultar el sistema.
+#
+# Formato del segmento: cabecera + dos ranuras. El publicador escribe siempre
+# en la ranura inactiva y luego la activa; un contador de secuencia (seqlock)
+# es impar mientras cambia la ranura activa, y el lector reintenta si el
+# contador no es el mismo antes y después de copiar los datos.
+
+SHM_NAME = 'sysfo_snapshot'
+SHM_MAGIC = b'SYSFOSHM'
+SHM_VERSION = 1
+SHM_SLOT_SIZE = 1024 * 1024
+_SHM_HEADER = struct.Struct('<8sIId')   # magia, versión, tamaño de ranura, intervalo
+_SHM_SEQ = 24                           # u64: contador de secuencia
+_SHM_ACTIVE = 32                        # u32: ranura activa
+_SHM_SLOTS = 40                         # Cada ranura: u32 longitud + JSON
+
+class SnapshotPublisher:
+    def __init__(self, name=SHM_NAME, slot_size=SHM_SLOT_SIZE, interval=2):
+        self.slot_size = slot_size
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=_SHM_SLOTS + 2 * slot_size)
+        buf = self.shm.buf
+        _SHM_HEADER.pack_into(buf, 0, SHM_MAGIC, SHM_VERSION, slot_size, interval)
+        struct.pack_into('<QI', buf, _SHM_SEQ, 0, 0)
+        self.seq = 0
+        self.active = 0
+
+    def publish(self, snapshot):
+        payload = json.dumps(snapshot, separators=(',', ':')).encode('utf-8')
+        if len(payload) + 4 > self.slot_size:
+            raise ValueError(f"La instantánea ocupa {len(payload)} bytes y la ranura solo {self.slot_size}")
+        buf = self.shm.buf
+        target = 1 - self.active
+        base = _SHM_SLOTS + target * self.slot_size
+        # La ranura inactiva se puede escribir sin molestar a los lectores
+        struct.pack_into('<I', buf, base, len(payload))
+        buf[base + 4:base + 4 + len(payload)] = payload
+        # Cambio de ranura protegido por el seqlock
+        struct.pack_into('<Q', buf, _SHM_SEQ, self.seq + 1)
+        struct.pack_into('<I', buf, _SHM_ACTIVE, target)
+        struct.pack_into('<Q', buf, _SHM_SEQ, self.seq + 2)
+        self.seq += 2
+        self.active = target
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+class SnapshotReader:
+    """Lee la última instantánea publicada. read() devuelve None si no hay una reciente."""
+
+    def __init__(self, name=SHM_NAME):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Antes de Python 3.13 no existe 'track': se evita que el resource
+            # tracker borre el segmento del publicador al salir este proceso
+            self.shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+            except Exception:
+                pass
+        magic, version, self.slot_size, self.interval = _SHM_HEADER.unpack_from(self.shm.buf, 0)
+        if magic != SHM_MAGIC or version != SHM_VERSION:
+            self.shm.close()
+            raise ValueError("El segmento compartido no es una instantánea de Sysfo compatible")
+
+    def read_raw(self, retries=100):
+        buf = self.shm.buf
+        for _ in range(retries):
+            seq = struct.unpack_from('<Q', buf, _SHM_SEQ)[0]
+            if seq % 2:
+                continue # El publicador está cambiando de ranura
+            active = struct.unpack_from('<I', buf, _SHM_ACTIVE)[0]
+            base = _SHM_SLOTS + active * self.slot_size
+            length = struct.unpack_from('<I', buf, base)[0]
+            data = bytes(buf[base + 4:base + 4 + min(length, self.slot_size - 4)])
+            if seq == struct.unpack_from('<Q', buf, _SHM_SEQ)[0]:
+                return data if seq else None
+        return None
+
+    def read(self, max_age=None):
+        data = self.read_raw()
+        if not data:
+            return None
+        snapshot = json.loads(data)
+        # Si el publicador dejó de actualizar, la instantánea no se usa
+        max_age = 3 * self.interval if max_age is None else max_age
+        if time.time() - snapshot.get('time', 0) > max_age:
+            return None
+        return snapshot
+
+    def close(self):
+        self.shm.close()
+
+def attach_snapshot(name=SHM_NAME):
+    """Devuelve un SnapshotReader si hay un publicador activo, o None."""
+    try:
+        return SnapshotReader(name)
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+
+def read_shared_snapshot(name=SHM_NAME):
+    reader = attach_snapshot(name)
+    if reader is None:
+        return None
+    try:
+        return reader.read()
+    finally:
+        reader.close()
+
+def current_sample(reader=None):
+    """Muestra del publicador compartido si está disponible; si no, se recoge aquí."""
+    snapshot = reader.read() if reader else None
+    return snapshot['sample'] if snapshot else collect_sample()
+
+def build_snapshot(static):
+    mem = psutil.virtual_memory()
+    disks = []
+    for partition in psutil.disk_partitions():
+        try:
+            usage = psutil.disk_usage(partition.mountpoint)
+        except:
+            continue
+        disks.append({'device': partition.device, 'mountpoint': partition.mountpoint, 'fstype': partition.fstype,
+                      'opts': partition.opts, 'total': usage.total, 'used': usage.used, 'free': usage.free, 'percent': usage.percent})
+    sample = collect_sample()
+    snapshot = dict(static, **{
+        'time': sample['time'],
+        'sample': sample,
+        'memory': {'total': mem.total, 'available': mem.available, 'used': mem.used, 'percent': mem.percent},
+        'disks': disks,
+        # Las temperaturas ya vienen en la muestra como 'temp:chip.sensor'
+        'temperatures': {name[5:]: value for name, value in sample.items() if name.startswith('temp:')},
+        'network': get_network_info(),
+    })
+    if platform.system() == "Linux":
+        snapshot.update({
+            'effective_cpus': get_effective_cpus(get_cgroup_limits()),
+            'batteries': get_power_monitor().batteries,
+            'container': get_container_info(),
+            'pressure': get_pressure_info(),
+        })
+    return snapshot
+
+def run_publish(args):
+    try:
+        publisher = SnapshotPublisher(args.name, interval=args.interval)
+    except FileExistsError:
+        print(f"Ya existe el segmento compartido '{args.name}' (¿hay otro publicador en marcha?)")
+        return
+    # Los datos que no cambian se recogen una sola vez
+    static = {'host': platform.node(), 'cpu_model': get_cpu_info(), 'gpu': get_gpu_info()}
+    print(f"Publicando instantáneas cada {args.interval} s en '{args.name}' (Ctrl+C para salir)")
+    # Al terminar con SIGTERM también se libera el segmento
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    psutil.cpu_percent() # La primera lectura de uso de CPU siempre es 0
+    try:
+        while True:
+            publisher.publish(build_snapshot(static))
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+
+# --- ALERTAS ---
+
+ALERT_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+
+DEFAULT_ALERT_RULES = [
+    "cpu_temp > 90 for 30s",
+    "disk_percent > 95",
+    "mem_available_gb < 1",
+]
+
+AlertRule = namedtuple('AlertRule', 'text metric op threshold duration hysteresis cooldown')
+AlertEvent = namedtuple('AlertEvent', 'rule series value state time')
+
+_RULE_PATTERN = re.compile(
+    r"^\s*(?P<metric>[\w.]+)\s*(?P<op>>=|<=|>|<)\s*(?P<threshold>-?[\d.]+)"
+    r"(?:\s+for\s+(?P<duration>[\d.]+)\s*s)?"
+    r"(?:\s+hysteresis\s+(?P<hysteresis>[\d.]+))?"
+    r"(?:\s+cooldown\s+(?P<cooldown>[\d.]+)\s*s)?\s*$"
+)
+
+def parse_alert_rule(text):
+    """
+    Interpreta una regla del tipo 'métrica > umbral [for N s] [hysteresis H] [cooldown N s]'.
+    Si no se indica, la histéresis es el 2% del umbral y el cooldown 300 s.
+    """
+    match = _RULE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Regla de alerta no válida: {text!r}")
+    threshold = float(match.group('threshold'))
+    hysteresis = match.group('hysteresis')
+    return AlertRule(
+        text=text.strip(),
+        metric=match.group('metric'),
+        op=match.group('op'),
+        threshold=threshold,
+        duration=float(match.group('duration') or 0),
+        hysteresis=float(hysteresis) if hysteresis is not None else abs(threshold) * 0.02,
+        cooldown=float(match.group('cooldown') or 300),
+    )
+
+class AlertEngine:
+    """
+    Evalúa las reglas sobre cada muestra nueva. Cada regla guarda un estado
+    pequeño por serie, así que el trabajo por muestra no depende del historial.
+    Las reglas cuya métrica no aparece en la muestra se ignoran.
+    """
+
+    def __init__(self, rules, sinks=()):
+        self.rules = [parse_alert_rule(r) if isinstance(r, str) else r for r in rules]
+        self.sinks = list(sinks)
+        # (regla, serie) -> [inicio de la condición, activa, último disparo]
+        self.state = {}
+        # Conjunto de claves de la muestra -> {métrica: [series]}
+        self._series_cache = {}
+
+    def series_map(self, sample):
+        """
+        Series de cada métrica ('disk_percent' se aplica a todas las series
+        'disk_percent:*'). El mapa se construye una vez por conjunto de claves,
+        así que evaluar una regla no recorre todas las métricas de la muestra.
+        """
+        signature = tuple(sample)
+        series = self._series_cache.get(signature)
+        if series is None:
+            if len(self._series_cache) >= 8:
+                self._series_cache.clear()
+            series = {}
+            for metric in {rule.metric for rule in self.rules}:
+                prefix = metric + ':'
+                series[metric] = ([metric] if metric in sample else []) + \
+                    [key for key in sample if key.startswith(prefix)]
+            self._series_cache[signature] = series
+        return series
+
+    def evaluate(self, sample, now=None):
+        now = sample.get('time', time.time()) if now is None else now
+        events = []
+        series_map = self.series_map(sample)
+        for rule in self.rules:
+            compare = ALERT_OPERATORS[rule.op]
+            # Umbral para dar la alerta por resuelta (desplazado por la histéresis)
+            if rule.op in ('>', '>='):
+                clear_at = rule.threshold - rule.hysteresis
+            else:
+                clear_at = rule.threshold + rule.hysteresis
+            for series in series_map[rule.metric]:
+                value = sample[series]
+                if value is None:
+                    continue
+                key = (rule.text, series)
+                state = self.state.setdefault(key, [None, False, None])
+                since, active, last_fired = state
+                if active:
+                    if not compare(value, clear_at):
+                        self.state[key] = [None, False, last_fired]
+                        events.append(AlertEvent(rule, series, value, 'resolved', now))
+                elif compare(value, rule.threshold):
+                    since = now if since is None else since
+                    cooled = last_fired is None or now - last_fired >= rule.cooldown
+                    if now - since >= rule.duration and cooled:
+                        self.state[key] = [since, True, now]
+                        events.append(AlertEvent(rule, series, value, 'firing', now))
+                    else:
+                        self.state[key] = [since, False, last_fired]
+                else:
+                    self.state[key] = [None, False, last_fired]
+        for event in events:
+            for sink in self.sinks:
+                try:
+                    sink(event)
+                except Exception:
+                    pass # Un destino que falla no debe detener la evaluación
+        return events
+
+def format_alert(event):
+    stamp = datetime.fromtimestamp(event.time).strftime('%Y-%m-%d %H:%M:%S')
+    state = "ALERTA" if event.state == 'firing' else "RESUELTA"
+    return f"[{stamp}] {state}: {event.rule.text} ({event.series} = {event.value})"
+
+def stdout_alert_sink(event):
+    print(format_alert(event), flush=True)
+
+class LogFileAlertSink:
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, event):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(format_alert(event) + "\n")
+
+class WebhookAlertSink:
+    """
+    Envía cada alerta como JSON por POST a un endpoint HTTP local. El envío se
+    hace en un hilo aparte para que un endpoint lento no frene el muestreo.
+    """
+
+    def __init__(self, url, timeout=2, max_pending=100):
+        self.url = url
+        self.timeout = timeout
+        self.pending = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._sender, name='sysfo-webhook', daemon=True)
+        self._thread.start()
+
+    def __call__(self, event):
+        payload = json.dumps({
+            'rule': event.rule.text,
+            'series': event.series,
+            'value': event.value,
+            'state': event.state,
+            'time': event.time,
+        }).encode('utf-8')
+        try:
+            self.pending.put_nowait(payload)
+        except queue.Full:
+            pass # Si el endpoint no responde se descartan las alertas más nuevas
+
+    def _sender(self):
+        while True:
+            payload = self.pending.get()
+            request = urllib.request.Request(self.url, data=payload, headers={'Content-Type': 'application/json'})
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except Exception:
+                pass
+
+def load_alert_rules(args):
+    rules = list(args.rule or [])
+    if args.rules_file:
+        with open(args.rules_file, encoding='utf-8') as f:
+            rules += [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    return rules or DEFAULT_ALERT_RULES
+
+def run_watch(args):
+    sinks = [stdout_alert_sink]
+    if args.log:
+        sinks.append(LogFileAlertSink(args.log))
+    if args.webhook:
+        sinks.append(WebhookAlertSink(args.webhook))
+    try:
+        engine = AlertEngine(load_alert_rules(args), sinks)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    except OSError as e:
+        print(f"No se pudo leer el archivo de reglas: {e}")
+        sys.exit(1)
+
+    print("Vigilando reglas (Ctrl+C para salir):")
+    for rule in engine.rules:
+        print(f"  · {rule.text}")
+    reader = attach_snapshot()
+    psutil.cpu_percent() # La primera lectura de uso de CPU siempre es 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            engine.evaluate(current_sample(reader))
+    except KeyboardInterrupt:
+        pass
+
+
+# --- HISTORIAL (SQLite) ---
+# Las muestras se guardan en una base SQLite local. Las escrituras se hacen en
+# un hilo aparte para no frenar el bucle de muestreo, y los resúmenes por
+# minuto y por hora permiten consultar semanas de historial rápidamente.
+# Las muestras crudas entran fila a fila en 'samples'; cuando un tramo de
+# BLOCK_SECONDS se cierra, se empaqueta en 'sample_blocks' como dos arrays
+# float64 (tiempos y valores) por métrica, que se leen sin decodificar filas.
+# Los resúmenes siguen el mismo esquema en 'rollup_1m_blocks' y
+# 'rollup_1h_blocks', con las columnas de cada fila seguidas en un array.
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser('~'), '.sysfo', 'history.db')
+
+# Segundos que se conserva cada nivel de detalle
+RETENTION = {'samples': 2 * 86400, 'rollup_1m': 30 * 86400, 'rollup_1h': 365 * 86400}
+BLOCK_SECONDS = 600
+ROLLUP_BLOCK_SECONDS = {'rollup_1m': 6 * 3600, 'rollup_1h': 7 * 86400}
+ROLLUP_COLUMNS = ('bucket', 'min', 'avg', 'max', 'count')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS samples (
+    metric_id INTEGER NOT NULL, ts REAL NOT NULL, value REAL NOT NULL,
+    PRIMARY KEY (metric_id, ts)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sample_blocks (
+    metric_id INTEGER NOT NULL, bucket INTEGER NOT NULL, ts BLOB NOT NULL, value BLOB NOT NULL,
+    PRIMARY KEY (metric_id, bucket)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1m (
+    metric_id INTEGER NOT NULL, bucket INTEGER NOT NULL,
+    min REAL, avg REAL, max REAL, count INTEGER,
+    PRIMARY KEY (metric_id, bucket)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1h (
+    metric_id INTEGER NOT NULL, bucket INTEGER NOT NULL,
+    min REAL, avg REAL, max REAL, count INTEGER,
+    PRIMARY KEY (metric_id, bucket)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1m_blocks (
+    metric_id INTEGER NOT NULL, bucket INTEGER NOT NULL, data BLOB NOT NULL,
+    PRIMARY KEY (metric_id, bucket)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1h_blocks (
+    metric_id INTEGER NOT NULL, bucket INTEGER NOT NULL, data BLOB NOT NULL,
+    PRIMARY KEY (metric_id, bucket)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL);
+"""
+
+def open_database(path=DEFAULT_DB_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+class MetricStore:
+    """
+    Guarda muestras de collect_sample() en SQLite. record() solo encola la
+    muestra; un hilo escritor las inserta por lotes y, periódicamente, calcula
+    los resúmenes (mín/media/máx) por minuto y hora y borra lo que caduca.
+    """
+    BATCH_SECONDS = 5      # Espera máxima antes de escribir un lote
+    MAINTENANCE_SECONDS = 60
+
+    def __init__(self, path=DEFAULT_DB_PATH, max_pending=10000):
+        self.path = path
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self._stop = threading.Event()
+        # La base se crea antes de arrancar el hilo para que los errores salgan aquí
+        open_database(path).close()
+        self._thread = threading.Thread(target=self._writer, name='sysfo-store', daemon=True)
+        self._thread.start()
+
+    def record(self, sample):
+        try:
+            self.pending.put_nowait(sample)
+        except queue.Full:
+            self.dropped += 1 # Nunca se bloquea el muestreo; se descarta la muestra
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _writer(self):
+        conn = open_database(self.path)
+        metric_ids = dict(conn.execute("SELECT name, id FROM metrics"))
+        last_maintenance = 0
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write_batch(conn, metric_ids, batch)
+            now = time.time()
+            if now - last_maintenance >= self.MAINTENANCE_SECONDS or (self._stop.is_set() and batch):
+                # Se deja un margen para las muestras que aún pueden estar en cola;
+                # el empaquetado va después del resumen, que lee de 'samples'
+                rollup(conn, now - 2 * self.BATCH_SECONDS)
+                pack_samples(conn, now - 2 * self.BATCH_SECONDS)
+                pack_rollups(conn, now - 2 * self.BATCH_SECONDS)
+                prune(conn, now)
+                last_maintenance = now
+            if self._stop.is_set() and self.pending.empty():
+                break
+        conn.close()
+
+    def _next_batch(self):
+        batch = []
+        try:
+            batch.append(self.pending.get(timeout=self.BATCH_SECONDS))
+            while True:
+                batch.append(self.pending.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, conn, metric_ids, batch):
+        rows = []
+        for sample in batch:
+            ts = sample.get('time', time.time())
+            for name, value in sample.items():
+                if name == 'time' or value is None:
+                    continue
+                metric_id = metric_ids.get(name)
+                if metric_id is None:
+                    conn.execute("INSERT OR IGNORE INTO metrics (name) VALUES (?)", (name,))
+                    metric_id = conn.execute("SELECT id FROM metrics WHERE name = ?", (name,)).fetchone()[0]
+                    metric_ids[name] = metric_id
+                rows.append((metric_id, ts, float(value)))
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO samples (metric_id, ts, value) VALUES (?, ?, ?)", rows)
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+def rollup(conn, now=None):
+    """
+    Resume los minutos y horas ya cerrados. Cada nivel recuerda hasta dónde
+    llegó, así que solo se procesan los datos nuevos desde la última vez.
+    """
+    now = time.time() if now is None else now
+    with conn:
+        start = _get_meta(conn, 'rollup_1m')
+        if start is None:
+            first = conn.execute("SELECT MIN(ts) FROM samples").fetchone()[0]
+            start = (int(first) // 60) * 60 if first is not None else None
+        end = (int(now) // 60) * 60
+        if start is not None and end > start:
+            conn.execute("""
+                INSERT OR REPLACE INTO rollup_1m (metric_id, bucket, min, avg, max, count)
+                SELECT metric_id, CAST(ts / 60 AS INTEGER) * 60, MIN(value), AVG(value), MAX(value), COUNT(*)
+                FROM samples WHERE ts >= ? AND ts < ?
+                GROUP BY metric_id, CAST(ts / 60 AS INTEGER)""", (start, end))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rollup_1m', ?)", (end,))
+
+        start = _get_meta(conn, 'rollup_1h')
+        if start is None:
+            first = conn.execute("SELECT MIN(bucket) FROM rollup_1m").fetchone()[0]
+            start = (int(first) // 3600) * 3600 if first is not None else None
+        end = (int(now) // 3600) * 3600
+        if start is not None and end > start:
+            conn.execute("""
+                INSERT OR REPLACE INTO rollup_1h (metric_id, bucket, min, avg, max, count)
+                SELECT metric_id, (bucket / 3600) * 3600, MIN(min), SUM(avg * count) / SUM(count), MAX(max), SUM(count)
+                FROM rollup_1m WHERE bucket >= ? AND bucket < ?
+                GROUP BY metric_id, bucket / 3600""", (start, end))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rollup_1h', ?)", (end,))
+
+def _pack_floats(values):
+    # Siempre little-endian, para que la base se pueda leer en otra máquina
+    packed = array('d', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def _unpack_floats(blob):
+    values = array('d')
+    values.frombytes(blob)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def pack_samples(conn, now=None):
+    """
+    Mueve a 'sample_blocks' las muestras de los tramos de BLOCK_SECONDS ya
+    cerrados. Si el bloque existe (muestras que llegaron tarde) se fusiona.
+    """
+    now = time.time() if now is None else now
+    end = (int(now) // BLOCK_SECONDS) * BLOCK_SECONDS
+    with conn:
+        blocks = {}
+        for metric_id, ts, value in conn.execute(
+                "SELECT metric_id, ts, value FROM samples WHERE ts < ? ORDER BY metric_id, ts", (end,)):
+            block = blocks.setdefault((metric_id, int(ts // BLOCK_SECONDS) * BLOCK_SECONDS), {})
+            block[ts] = value
+        for (metric_id, bucket), block in blocks.items():
+            row = conn.execute("SELECT ts, value FROM sample_blocks WHERE metric_id = ? AND bucket = ?",
+                               (metric_id, bucket)).fetchone()
+            if row:
+                # Las muestras nuevas sustituyen a las del bloque con el mismo instante
+                block = {**dict(zip(_unpack_floats(row[0]), _unpack_floats(row[1]))), **block}
+            stamps = sorted(block)
+            conn.execute("INSERT OR REPLACE INTO sample_blocks (metric_id, bucket, ts, value) VALUES (?, ?, ?, ?)",
+                         (metric_id, bucket, _pack_floats(stamps), _pack_floats(block[t] for t in stamps)))
+        conn.execute("DELETE FROM samples WHERE ts < ?", (end,))
+
+def read_raw_samples(conn, metric_id, start, end):
+    """
+    Muestras crudas de una métrica en [start, end) como dos arrays (tiempos,
+    valores): los bloques empaquetados más las filas aún sin empaquetar.
+    """
+    ts, values = array('d'), array('d')
+    for stamps, block in conn.execute(
+            "SELECT ts, value FROM sample_blocks WHERE metric_id = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (metric_id, (int(start) // BLOCK_SECONDS) * BLOCK_SECONDS, end)):
+        ts.extend(_unpack_floats(stamps))
+        values.extend(_unpack_floats(block))
+    for stamp, value in conn.execute(
+            "SELECT ts, value FROM samples WHERE metric_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (metric_id, start, end)):
+        ts.append(stamp)
+        values.append(value)
+    return ts, values
+
+def pack_rollups(conn, now=None):
+    """
+    Empaqueta las filas de rollup_1m y rollup_1h de los tramos ya cerrados en
+    su tabla '_blocks': (bucket, mín, media, máx, n) seguidos en un array. El
+    tramo por hora se cierra antes que el de 6 h, así que rollup_1h ya ha
+    leído las filas por minuto que se empaquetan.
+    """
+    now = time.time() if now is None else now
+    width = len(ROLLUP_COLUMNS)
+    for table, block_seconds in ROLLUP_BLOCK_SECONDS.items():
+        end = (int(now) // block_seconds) * block_seconds
+        with conn:
+            blocks = {}
+            for row in conn.execute(f"SELECT metric_id, bucket, min, avg, max, count FROM {table} "
+                                    "WHERE bucket < ? ORDER BY metric_id, bucket", (end,)):
+                blocks.setdefault((row[0], row[1] // block_seconds * block_seconds), {})[row[1]] = row[1:]
+            for (metric_id, bucket), rows in blocks.items():
+                existing = conn.execute(f"SELECT data FROM {table}_blocks WHERE metric_id = ? AND bucket = ?",
+                                        (metric_id, bucket)).fetchone()
+                if existing:
+                    data = _unpack_floats(existing[0])
+                    rows = {**{data[i]: tuple(data[i:i + width]) for i in range(0, len(data), width)}, **rows}
+                conn.execute(f"INSERT OR REPLACE INTO {table}_blocks (metric_id, bucket, data) VALUES (?, ?, ?)",
+                             (metric_id, bucket, _pack_floats(v for key in sorted(rows) for v in rows[key])))
+            conn.execute(f"DELETE FROM {table} WHERE bucket < ?", (end,))
+
+def read_rollup_rows(conn, table, metric_id, start, end):
+    """
+    Filas de un resumen en [start, end) como un array plano con las columnas
+    de ROLLUP_COLUMNS seguidas: los bloques más las filas sin empaquetar.
+    """
+    block_seconds = ROLLUP_BLOCK_SECONDS[table]
+    data = array('d')
+    for (blob,) in conn.execute(
+            f"SELECT data FROM {table}_blocks WHERE metric_id = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (metric_id, (int(start) // block_seconds) * block_seconds, end)):
+        data.extend(_unpack_floats(blob))
+    for row in conn.execute(f"SELECT bucket, min, avg, max, count FROM {table} "
+                            "WHERE metric_id = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                            (metric_id, start, end)):
+        data.extend(row)
+    return data
+
+def prune(conn, now=None):
+    now = time.time() if now is None else now
+    with conn:
+        conn.execute("DELETE FROM samples WHERE ts < ?", (now - RETENTION['samples'],))
+        conn.execute("DELETE FROM sample_blocks WHERE bucket + ? <= ?", (BLOCK_SECONDS, now - RETENTION['samples']))
+        for table, block_seconds in ROLLUP_BLOCK_SECONDS.items():
+            conn.execute(f"DELETE FROM {table} WHERE bucket < ?", (now - RETENTION[table],))
+            conn.execute(f"DELETE FROM {table}_blocks WHERE bucket + ? <= ?", (block_seconds, now - RETENTION[table]))
+
+def choose_resolution(start, end):
+    """Elige la tabla según el rango: muestras crudas, resumen por minuto o por hora."""
+    span = end - start
+    now = time.time()
+    if span <= 6 * 3600 and start >= now - RETENTION['samples']:
+        return 'samples'
+    if span <= 14 * 86400 and start >= now - RETENTION['rollup_1m']:
+        return 'rollup_1m'
+    return 'rollup_1h'
+
+def list_metrics(conn, pattern='%'):
+    return [row[0] for row in conn.execute("SELECT name FROM metrics WHERE name LIKE ? ORDER BY name", (pattern,))]
+
+def query_range(conn, metric, start, end, resolution=None):
+    """
+    Devuelve las filas de una métrica entre start y end. Con muestras crudas
+    cada fila es (ts, valor); con resúmenes es (bucket, mín, media, máx, n).
+    """
+    resolution = resolution or choose_resolution(start, end)
+    row = conn.execute("SELECT id FROM metrics WHERE name = ?", (metric,)).fetchone()
+    if row is None:
+        return []
+    if resolution == 'samples':
+        ts, values = read_raw_samples(conn, row[0], start, end)
+        return [(stamp, value) for stamp, value in zip(ts, values) if start <= stamp < end]
+    data = read_rollup_rows(conn, resolution, row[0], start, end)
+    width = len(ROLLUP_COLUMNS)
+    return [(int(data[i]), data[i + 1], data[i + 2], data[i + 3], int(data[i + 4]))
+            for i in range(0, len(data), width) if start <= data[i] < end]
+
+def run_record(args):
+    store = MetricStore(args.db)
+    print(f"Guardando muestras cada {args.interval} s en {args.db} (Ctrl+C para salir)")
+    reader = attach_snapshot()
+    psutil.cpu_percent() # La primera lectura de uso de CPU siempre es 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            store.record(current_sample(reader))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+# --- CONSULTAS DEL HISTORIAL ---
+# 'sysfo query' carga un rango del historial en arrays de NumPy y calcula las
+# estadísticas de todas las series a la vez, sin recorrer filas en Python.
+
+DEFAULT_QUERY_METRICS = ['cpu_percent', 'cpu_temp', 'mem_percent', 'mem_available_gb', 'disk_percent:*',
+                         'net_bytes_sent', 'net_bytes_recv', 'disk_read_bytes', 'disk_write_bytes', 'psi_*',
+                         'power_*', 'battery_watts:*', 'battery_drain_percent_per_hour:*']
+
+# Contadores acumulados: se convierten en KB/s antes de calcular estadísticas
+RATE_METRICS = ('net_bytes_*', 'disk_read_bytes', 'disk_write_bytes')
+
+# Umbral por defecto para 'tiempo por encima' según el prefijo de la métrica
+DEFAULT_THRESHOLDS = {'cpu_percent': 90, 'cpu_core': 90, 'cpu_temp': 80, 'temp': 80, 'mem_percent': 90,
+                      'disk_percent': 90, 'cgroup_mem_percent': 90, 'psi': 10,
+                      'battery_drain_percent_per_hour': 20}
+
+PERCENTILES = (50, 95, 99)
+
+def parse_duration(text):
+    """Convierte '90s', '30m', '24h' o '7d' en segundos."""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    match = re.match(r"^\s*([\d.]+)\s*([smhd]?)\s*$", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Duración no válida: {text!r}")
+    return float(match.group(1)) * units[match.group(2) or 's']
+
+def parse_time(text):
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+def load_series(conn, patterns, start, end, resolution):
+    """
+    Carga todas las métricas que encajan con los patrones. Devuelve
+    (nombres, ids, ts, valores, máximos) con las filas ordenadas por métrica
+    y tiempo; 'ids' indexa en 'nombres'. Tanto las muestras crudas como los
+    resúmenes se leen de los bloques empaquetados con np.frombuffer.
+    """
+    names = [name for name in list_metrics(conn) if any(fnmatch.fnmatch(name, p) for p in patterns)]
+    ts_chunks, value_chunks, max_chunks = [], [], []
+    for name in names:
+        metric_id = conn.execute("SELECT id FROM metrics WHERE name = ?", (name,)).fetchone()[0]
+        if resolution == 'samples':
+            raw_ts, raw_values = read_raw_samples(conn, metric_id, start, end)
+            ts_chunk, value_chunk = np.frombuffer(raw_ts), np.frombuffer(raw_values)
+            # Los bloques de los extremos pueden salirse del rango pedido
+            inside = (ts_chunk >= start) & (ts_chunk < end)
+            ts_chunks.append(ts_chunk[inside])
+            value_chunks.append(value_chunk[inside])
+        else:
+            rows = np.frombuffer(read_rollup_rows(conn, resolution, metric_id, start, end))
+            rows = rows.reshape(-1, len(ROLLUP_COLUMNS))
+            rows = rows[(rows[:, 0] >= start) & (rows[:, 0] < end)]
+            ts_chunks.append(rows[:, 0])
+            value_chunks.append(rows[:, 2])
+            max_chunks.append(rows[:, 3])
+    if not ts_chunks:
+        empty = np.empty(0)
+        return names, empty.astype(np.int64), empty, empty, empty
+    ids = np.repeat(np.arange(len(names)), [len(chunk) for chunk in ts_chunks])
+    values = np.concatenate(value_chunks)
+    # En las muestras crudas el máximo es el propio valor
+    maxes = values if resolution == 'samples' else np.concatenate(max_chunks)
+    return names, ids, np.concatenate(ts_chunks), values, maxes
+
+def to_rates(names, ids, ts, values, maxes):
+    """Sustituye los contadores acumulados por su variación en KB/s."""
+    is_rate = np.array([any(fnmatch.fnmatch(n, p) for p in RATE_METRICS) for n in names], dtype=bool)
+    if len(ids) < 2 or not is_rate.any():
+        return ids, ts, values, maxes
+    same = ids[1:] == ids[:-1]
+    dt = np.diff(ts)
+    delta = np.diff(values)
+    rate = np.where(same & (dt > 0), delta / np.where(dt > 0, dt, 1) / 1024, np.nan)
+    rate_rows = is_rate[ids]
+    # Cada fila de contador toma la tasa hasta la siguiente; la última de cada serie
+    # y las que tienen un contador reiniciado (tasa negativa) se descartan
+    new_values = values.copy()
+    new_values[:-1] = np.where(rate_rows[:-1], rate, values[:-1])
+    new_values[-1] = np.nan if rate_rows[-1] else values[-1]
+    new_maxes = np.where(rate_rows, new_values, maxes)
+    keep = ~(rate_rows & (np.isnan(new_values) | (new_values < 0)))
+    return ids[keep], ts[keep], new_values[keep], new_maxes[keep]
+
+def threshold_for(name, overrides):
+    if name in overrides:
+        return overrides[name]
+    base = name.split(':')[0]
+    for key in (base, base.split('_')[0]):
+        if key in overrides:
+            return overrides[key]
+        if key in DEFAULT_THRESHOLDS:
+            return DEFAULT_THRESHOLDS[key]
+    return np.nan
+
+def summarize_series(names, ids, ts, values, maxes, thresholds, bucket_width=None):
+    """
+    Calcula n, media, percentiles, máximo y tiempo por encima del umbral de
+    todas las series a la vez. Las filas deben venir ordenadas por serie y tiempo.
+    """
+    if len(ids) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    counts = np.diff(np.r_[starts, len(ids)])
+    series = ids[starts]
+
+    # Duración que representa cada fila: hasta la siguiente muestra de la misma
+    # serie, limitada a 3 veces el intervalo típico para no contar huecos
+    if bucket_width:
+        dt = np.full(len(ts), float(bucket_width))
+    else:
+        dt = np.r_[np.diff(ts), 0.0]
+        dt[starts[1:] - 1] = 0.0
+        dt[-1] = 0.0
+        typical = np.median(dt[dt > 0]) if (dt > 0).any() else 0.0
+        dt = np.minimum(dt, 3 * typical)
+    limits = np.array([threshold_for(n, thresholds) for n in names])[ids]
+    above = np.add.reduceat(np.where(values > limits, dt, 0.0), starts)
+
+    # Percentiles con interpolación lineal sobre los valores ordenados dentro
+    # de cada serie (las series ya son tramos contiguos del array)
+    ordered = values.copy()
+    for first, count in zip(starts, counts):
+        ordered[first:first + count].sort()
+    result_percentiles = {}
+    for q in PERCENTILES:
+        position = starts + (counts - 1) * (q / 100.0)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        result_percentiles[q] = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    means = np.add.reduceat(values, starts) / counts
+    peaks = np.maximum.reduceat(maxes, starts)
+
+    summary = {}
+    for i, index in enumerate(series):
+        summary[names[index]] = {
+            'n': int(counts[i]),
+            'mean': float(means[i]),
+            **{f'p{q}': float(result_percentiles[q][i]) for q in PERCENTILES},
+            'max': float(peaks[i]),
+            'threshold': None if np.isnan(limits[starts[i]]) else float(limits[starts[i]]),
+            'seconds_above': float(above[i]),
+        }
+    return summary
+
+def core_imbalance(names, ids, ts, values):
+    """
+    Desequilibrio entre núcleos: para cada instante, diferencia entre el núcleo
+    más y el menos cargado. Se usan las filas 'cpu_core:N' alineadas por tiempo.
+    """
+    core_series = np.array([n.startswith('cpu_core:') for n in names], dtype=bool)
+    if len(ids) == 0 or not core_series.any():
+        return None
+    mask = core_series[ids]
+    if not mask.any():
+        return None
+    stamps, column = np.unique(ts[mask], return_inverse=True)
+    cores = np.unique(ids[mask], return_inverse=True)[1]
+    grid = np.full((cores.max() + 1, len(stamps)), np.nan)
+    grid[cores, column] = values[mask]
+    spread = np.nanmax(grid, axis=0) - np.nanmin(grid, axis=0)
+    mean_load = np.nanmean(grid, axis=0)
+    ratio = np.nanmax(grid, axis=0) / np.where(mean_load > 0, mean_load, np.nan)
+    return {
+        'cores': int(cores.max() + 1),
+        'spread_mean': float(np.mean(spread)),
+        'spread_p95': float(np.percentile(spread, 95)),
+        'spread_max': float(np.max(spread)),
+        'max_over_mean_p95': float(np.nanpercentile(ratio, 95)) if np.isfinite(ratio).any() else None,
+    }
+
+def format_query_table(report):
+    header = f"{'Métrica':<32}{'n':>9}{'media':>10}" + "".join(f"{'p' + str(q):>10}" for q in PERCENTILES) \
+        + f"{'máx':>10}{'umbral':>9}{'t>umbral':>12}"
+    lines = [f"Rango: {report['start']} → {report['end']} (resolución: {report['resolution']})", "", header,
+             "-" * len(header)]
+    for name, stats in report['series'].items():
+        threshold = '-' if stats['threshold'] is None else f"{stats['threshold']:g}"
+        lines.append(f"{name:<32}{stats['n']:>9}{stats['mean']:>10.2f}"
+                     + "".join(f"{stats['p' + str(q)]:>10.2f}" for q in PERCENTILES)
+                     + f"{stats['max']:>10.2f}{threshold:>9}{str(timedelta(seconds=int(stats['seconds_above']))):>12}")
+    if not report['series']:
+        lines.append("No hay muestras en el rango indicado")
+    if report.get('core_imbalance'):
+        imbalance = report['core_imbalance']
+        lines += ["", f"Desequilibrio entre núcleos ({imbalance['cores']} núcleos, máx - mín en puntos de %):",
+                  f"  media {imbalance['spread_mean']:.1f}, p95 {imbalance['spread_p95']:.1f}, máx {imbalance['spread_max']:.1f}"]
+    return "\n".join(lines)
+
+def run_query(args):
+    if np is None:
+        print("El comando 'query' requiere NumPy: pip install numpy")
+        return
+    end = parse_time(args.end) if args.end else time.time()
+    start = parse_time(args.start) if args.start else end - args.since
+    resolution = 'samples' if args.raw else choose_resolution(start, end)
+    thresholds = {}
+    for item in args.threshold or []:
+        name, _, value = item.partition('=')
+        thresholds[name] = float(value)
+
+    conn = open_database(args.db)
+    patterns = args.metric or DEFAULT_QUERY_METRICS
+    # Sin --metric se cargan también los núcleos para el desequilibrio; con
+    # --metric solo si se piden, y el desequilibrio usa los que se hayan cargado
+    load_patterns = list(patterns) if args.metric else list(patterns) + ['cpu_core:*']
+    names, ids, ts, values, maxes = load_series(conn, load_patterns, start, end, resolution)
+    conn.close()
+    ids, ts, values, maxes = to_rates(names, ids, ts, values, maxes)
+    bucket_width = {'rollup_1m': 60, 'rollup_1h': 3600}.get(resolution)
+    summary = summarize_series(names, ids, ts, values, maxes, thresholds, bucket_width)
+
+    report = {
+        'start': datetime.fromtimestamp(start).isoformat(timespec='seconds'),
+        'end': datetime.fromtimestamp(end).isoformat(timespec='seconds'),
+        'resolution': resolution,
+        'series': {name: stats for name, stats in summary.items()
+                   if any(fnmatch.fnmatch(name, p) for p in patterns)},
+        'core_imbalance': core_imbalance(names, ids, ts, values),
+    }
+    if args.format == 'json':
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(format_query_table(report))
+
+# --- BENCHMARK ---
+# 'sysfo bench' mide el rendimiento real: cómputo en uno y en todos los núcleos
+# (curva de escalado) y ancho de banda / latencia de memoria. El resultado se
+# compara con una referencia guardada para el mismo modelo de CPU.
+
+BENCH_BASELINE_PATH = os.path.join(os.path.expanduser('~'), '.sysfo', 'bench_baselines.json')
+BENCH_MEMORY_MB = 256
+BENCH_WARNING_PERCENT = 15 # Diferencia a partir de la cual se avisa de un rendimiento degradado
+
+def _bench_kernel(iterations):
+    # Mezcla de aritmética entera y accesos a lista; no depende de librerías externas
+    table = list(range(256))
+    acc = 0
+    for i in range(iterations):
+        acc = (acc * 31 + table[i & 255]) & 0xFFFFFFFF
+    return acc
+
+def bench_worker(duration):
+    """Ejecuta el kernel durante 'duration' segundos y devuelve operaciones por segundo."""
+    chunk = 20000
+    done = 0
+    start = time.perf_counter()
+    while True:
+        _bench_kernel(chunk)
+        done += chunk
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return done / elapsed
+
+def bench_worker_counts(cpus):
+    counts = []
+    n = 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    counts.append(cpus)
+    return counts
+
+def bench_cpu(duration, cpus):
+    """Curva de escalado: operaciones por segundo totales con 1, 2, 4... procesos."""
+    curve = []
+    with ProcessPoolExecutor(max_workers=cpus) as pool:
+        list(pool.map(_bench_kernel, [1000] * cpus)) # Arranca todos los procesos antes de medir
+        for workers in bench_worker_counts(cpus):
+            total = sum(pool.map(bench_worker, [duration] * workers))
+            curve.append({'workers': workers, 'ops_per_sec': total})
+    single = curve[0]['ops_per_sec']
+    for point in curve:
+        point['speedup'] = point['ops_per_sec'] / single
+        point['efficiency'] = point['speedup'] / point['workers']
+    return curve
+
+BENCH_CHASE_HOPS = 2 * 1024 * 1024
+BENCH_CHASE_SMALL = 4096  # Entradas de la cadena que cabe en L1, para medir el coste del intérprete
+
+def largest_cache_bytes():
+    topology = get_cpu_topology() if platform.system() == "Linux" else None
+    sizes = [cache['size_kb'] for cache in (topology or {}).get('caches', []) if cache['size_kb']]
+    return max(sizes) * 1024 if sizes else 0
+
+def cyclic_permutation(count, rng):
+    """Array en el que seguir i = links[i] recorre las 'count' posiciones en un único ciclo aleatorio."""
+    order = rng.permutation(count)
+    links = np.empty(count, dtype=np.int64)
+    links[order[:-1]] = order[1:]
+    links[order[-1]] = order[0]
+    return links
+
+def chase_pointers(links, hops):
+    """Segundos por salto; cada lectura depende de la anterior, así que no se solapan."""
+    links = memoryview(links)
+    i = 0
+    start = time.perf_counter()
+    for _ in range(hops):
+        i = links[i]
+    return (time.perf_counter() - start) / hops
+
+def bench_memory(size_mb=BENCH_MEMORY_MB, repeats=5):
+    """
+    Ancho de banda de copia entre dos buffers grandes (se cuenta lectura más
+    escritura) y, si NumPy está disponible, latencia de memoria medida con una
+    persecución de punteros sobre un buffer mayor que la caché más grande.
+    """
+    size = size_mb * 1024 * 1024
+    source = bytearray(os.urandom(1024)) * (size // 1024)
+    target = bytearray(size)
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        target[:] = source
+        best = min(best, time.perf_counter() - start)
+    del source, target
+    result = {'buffer_mb': size_mb, 'copy_gb_per_sec': 2 * size / best / (1024 ** 3),
+              'latency_ns': None, 'latency_buffer_mb': None}
+
+    if np is not None:
+        # Cada salto es una lectura que depende de la anterior en una posición
+        # aleatoria, así que mide la latencia y no el ancho de banda. El bucle
+        # es Python: se resta lo que tarda la misma cadena cuando cabe en L1.
+        chase_size = max(size, 2 * largest_cache_bytes())
+        rng = np.random.default_rng(0)
+        large = cyclic_permutation(chase_size // 8, rng)
+        small = cyclic_permutation(BENCH_CHASE_SMALL, rng)
+        overhead = min(chase_pointers(small, BENCH_CHASE_HOPS) for _ in range(2))
+        hop = min(chase_pointers(large, BENCH_CHASE_HOPS) for _ in range(2))
+        result['latency_ns'] = max(hop - overhead, 0) * 1e9
+        result['latency_buffer_mb'] = chase_size // (1024 * 1024)
+    return result
+
+def load_bench_baselines(path=BENCH_BASELINE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_bench_baseline(model, results, path=BENCH_BASELINE_PATH):
+    baselines = load_bench_baselines(path)
+    baselines[model] = results
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=2, ensure_ascii=False)
+
+def bench_params(results):
+    """Parámetros de la ejecución; las referencias antiguas no los guardaban y se deducen si se puede."""
+    if 'params' in results:
+        return results['params']
+    return {'duration': None, 'cpus': results['cpu'][-1]['workers'], 'memory_mb': results['memory']['buffer_mb'],
+            'latency_buffer_mb': results['memory'].get('latency_buffer_mb')}
+
+def compare_with_baseline(results, baseline):
+    """
+    Compara solo las métricas medidas con los mismos parámetros que la
+    referencia. Devuelve (comparaciones, omitidas): cada comparación es
+    (nombre, actual, referencia, diferencia %, peor) y cada omitida
+    (nombre, motivo).
+    """
+    current, reference = bench_params(results), bench_params(baseline)
+    labels = {'duration': 'duración', 'cpus': 'procesos', 'memory_mb': 'MB de memoria',
+              'latency_buffer_mb': 'MB de la persecución de punteros'}
+    # (nombre, actual, referencia, menor es mejor, parámetros que deben coincidir)
+    metrics = [
+        ('Un núcleo (ops/s)', results['cpu'][0]['ops_per_sec'], baseline['cpu'][0]['ops_per_sec'],
+         False, ('duration',)),
+        ('Todos los núcleos (ops/s)', results['cpu'][-1]['ops_per_sec'], baseline['cpu'][-1]['ops_per_sec'],
+         False, ('duration', 'cpus')),
+        ('Copia de memoria (GB/s)', results['memory']['copy_gb_per_sec'], baseline['memory']['copy_gb_per_sec'],
+         False, ('memory_mb',)),
+        ('Latencia de memoria (ns)', results['memory']['latency_ns'], baseline['memory'].get('latency_ns'),
+         True, ('latency_buffer_mb',)),
+    ]
+    comparisons, skipped = [], []
+    for name, value, base, lower_is_better, keys in metrics:
+        if value is None or not base:
+            skipped.append((name, "no medida en esta ejecución o en la referencia"))
+            continue
+        different = [f"{labels[key]} {current.get(key)} frente a "
+                     f"{'(no guardado)' if reference.get(key) is None else reference.get(key)}"
+                     for key in keys if current.get(key) != reference.get(key)]
+        if different:
+            skipped.append((name, "parámetros distintos: " + ", ".join(different)))
+            continue
+        diff = (value - base) * 100 / base
+        worse = diff > BENCH_WARNING_PERCENT if lower_is_better else diff < -BENCH_WARNING_PERCENT
+        comparisons.append((name, value, base, diff, worse))
+    return comparisons, skipped
+
+def run_bench(args):
+    model = get_cpu_info()
+    cpus = max(1, int(get_effective_cpus(get_cgroup_limits() if platform.system() == "Linux" else None)))
+    print(f"Benchmark de {model} con hasta {cpus} procesos...")
+
+    results = {
+        'model': model,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'cpu': bench_cpu(args.duration, cpus),
+        'memory': bench_memory(args.memory_mb),
+    }
+    # Con otros parámetros los resultados no son comparables con la referencia
+    results['params'] = {'duration': args.duration, 'cpus': cpus, 'memory_mb': args.memory_mb,
+                         'latency_buffer_mb': results['memory']['latency_buffer_mb']}
+
+    print("\n[+] CPU (escalado por número de procesos):")
+    for point in results['cpu']:
+        print(f"  {point['workers']:>4} procesos: {point['ops_per_sec'] / 1e6:8.2f} Mops/s  "
+              f"x{point['speedup']:.2f}  eficiencia {point['efficiency'] * 100:.0f}%")
+
+    memory = results['memory']
+    print(f"\n[+] Memoria ({memory['buffer_mb']} MB):")
+    print(f"  Copia: {memory['copy_gb_per_sec']:.2f} GB/s")
+    if memory['latency_ns'] is not None:
+        print(f"  Latencia: {memory['latency_ns']:.1f} ns por salto "
+              f"(persecución de punteros en {memory['latency_buffer_mb']} MB)")
+    else:
+        print("  Latencia: requiere NumPy")
+
+    baseline = load_bench_baselines(args.baseline).get(model)
+    if args.save_baseline:
+        save_bench_baseline(model, results, args.baseline)
+        print(f"\nResultados guardados como referencia para {model}")
+    elif baseline:
+        print(f"\n[+] Comparación con la referencia del {baseline['date']}:")
+        comparisons, skipped = compare_with_baseline(results, baseline)
+        for name, current, reference, diff, worse in comparisons:
+            warning = "  <-- peor de lo esperado" if worse else ""
+            print(f"  {name}: {current:,.2f} frente a {reference:,.2f} ({diff:+.1f}%){warning}")
+        for name, reason in skipped:
+            print(f"  {name}: sin comparar ({reason})")
+        if skipped:
+            print("  Repite con los mismos parámetros o guarda una nueva referencia con --save-baseline")
+    else:
+        print("\nNo hay referencia para este modelo de CPU; usa --save-baseline para guardarla")
+
+# --- PRUEBA DE ALMACENAMIENTO ---
+# 'sysfo probe' mide el rendimiento real de cada punto de montaje con un
+# archivo temporal: lectura/escritura secuencial y aleatoria, con O_DIRECT
+# cuando el sistema lo permite para no medir la caché de páginas.
+
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'sshfs', 'fuse.sshfs', '9p', 'afs',
+                       'glusterfs', 'fuse.glusterfs', 'ceph', 'fuse.ceph', 'davfs', 'fuse.davfs2', 'lustre'}
+PROBE_MAX_MB = 4096          # Límites estrictos, se apliquen los valores que se apliquen
+PROBE_MAX_SECONDS = 30
+PROBE_MAX_TOTAL_SECONDS = 300  # Tope de toda la ejecución, sumando todos los montajes
+PROBE_BLOCK = 1024 * 1024    # Bloque de las pruebas secuenciales
+PROBE_RANDOM_BLOCK = 4096    # Bloque de las pruebas aleatorias
+PROBE_FILE_NAME = '.sysfo-probe-{pid}.tmp'
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+def _pread(fd, buffer, offset):
+    if hasattr(os, 'preadv'):
+        return os.preadv(fd, [buffer], offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.readv(fd, [buffer]) if hasattr(os, 'readv') else len(os.read(fd, len(buffer)))
+
+def _pwrite(fd, buffer, offset):
+    if hasattr(os, 'pwritev'):
+        return os.pwritev(fd, [buffer], offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.write(fd, buffer)
+
+def open_probe_file(path, flags):
+    """
+    Abre el archivo con O_DIRECT si existe y el sistema de archivos lo admite.
+    Devuelve (descriptor, directo). Sin O_DIRECT las escrituras usan O_DSYNC
+    y antes de leer se pide al kernel que descarte la caché del archivo.
+    """
+    flags |= getattr(os, 'O_BINARY', 0)
+    if hasattr(os, 'O_DIRECT'):
+        try:
+            return os.open(path, flags | os.O_DIRECT, 0o600), True
+        except OSError:
+            pass # tmpfs y otros no admiten O_DIRECT
+    return os.open(path, flags | getattr(os, 'O_DSYNC', 0), 0o600), False
+
+def drop_cache(fd):
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def probe_stop_time(start, time_limit, deadline):
+    """Instante en que debe parar una prueba: su propio límite o el plazo total, lo que llegue antes."""
+    stop = start + time_limit
+    return stop if deadline is None else min(stop, deadline)
+
+def probe_sequential(path, size, time_limit, write, deadline=None):
+    # mmap devuelve memoria alineada a página, como exige O_DIRECT
+    buffer = mmap.mmap(-1, PROBE_BLOCK)
+    if write:
+        buffer.write(os.urandom(PROBE_BLOCK))
+    flags = (os.O_WRONLY | os.O_CREAT) if write else os.O_RDONLY
+    fd, direct = open_probe_file(path, flags)
+    try:
+        if not direct and not write:
+            drop_cache(fd)
+        done = 0
+        start = time.perf_counter()
+        stop = probe_stop_time(start, time_limit, deadline)
+        while done < size and time.perf_counter() < stop:
+            count = _pwrite(fd, buffer, done) if write else _pread(fd, buffer, done)
+            if count <= 0:
+                break
+            done += count
+        if write:
+            os.fsync(fd)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.close(fd)
+        buffer.close()
+    return {'mb_per_sec': done / elapsed / (1024 ** 2), 'bytes': done, 'seconds': elapsed, 'direct': direct}
+
+def probe_random(path, size, time_limit, write, max_ops=20000, deadline=None):
+    buffer = mmap.mmap(-1, PROBE_RANDOM_BLOCK)
+    if write:
+        buffer.write(os.urandom(PROBE_RANDOM_BLOCK))
+    blocks = size // PROBE_RANDOM_BLOCK
+    fd, direct = open_probe_file(path, os.O_WRONLY if write else os.O_RDONLY)
+    latencies = []
+    try:
+        if not direct and not write:
+            drop_cache(fd)
+        start = time.perf_counter()
+        stop = probe_stop_time(start, time_limit, deadline)
+        # Al menos una operación, para que siempre haya percentiles que mostrar
+        while not latencies or (len(latencies) < max_ops and time.perf_counter() < stop):
+            offset = random.randrange(blocks) * PROBE_RANDOM_BLOCK
+            op_start = time.perf_counter()
+            if write:
+                _pwrite(fd, buffer, offset)
+            else:
+                _pread(fd, buffer, offset)
+            latencies.append(time.perf_counter() - op_start)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.close(fd)
+        buffer.close()
+    latencies.sort()
+    return {
+        'iops': len(latencies) / elapsed,
+        'ops': len(latencies),
+        'latency_ms': {f'p{q}': percentile(latencies, q) * 1000 for q in (50, 95, 99)},
+        'direct': direct,
+    }
+
+def find_readable_file(mountpoint, min_size, max_entries=2000):
+    """En montajes de solo lectura busca un archivo existente para las pruebas de lectura."""
+    seen = 0
+    for root, dirs, files in os.walk(mountpoint):
+        for name in files:
+            seen += 1
+            path = os.path.join(root, name)
+            try:
+                if (os.path.isfile(path) and not os.path.islink(path) and os.path.getsize(path) >= min_size
+                        and os.access(path, os.R_OK)):
+                    return path
+            except OSError:
+                pass
+            if seen >= max_entries:
+                return None
+    return None
+
+def select_probe_mounts(mounts=None, include_network=False, include_readonly=False):
+    """Devuelve [(partición, motivo para omitirla o None)]."""
+    selected = []
+    for partition in psutil.disk_partitions():
+        if mounts and partition.mountpoint not in mounts:
+            continue
+        options = partition.opts.split(',')
+        reason = None
+        if partition.fstype.lower() in NETWORK_FILESYSTEMS and not include_network:
+            reason = "sistema de archivos de red (usa --include-network)"
+        elif 'ro' in options and not include_readonly:
+            reason = "solo lectura (usa --include-readonly)"
+        selected.append((partition, reason))
+    return selected
+
+def deadline_passed(deadline):
+    return deadline is not None and time.perf_counter() >= deadline
+
+def probe_mount(partition, size, time_limit, deadline=None):
+    readonly = 'ro' in partition.opts.split(',')
+    result = {'mountpoint': partition.mountpoint, 'device': partition.device, 'fstype': partition.fstype}
+    timeout = "límite de tiempo total alcanzado, pruebas restantes omitidas"
+    if readonly:
+        path = find_readable_file(partition.mountpoint, PROBE_RANDOM_BLOCK * 16)
+        if path is None:
+            result['error'] = "no se encontró un archivo para las pruebas de lectura"
+            return result
+        try:
+            size = min(size, os.path.getsize(path) // PROBE_RANDOM_BLOCK * PROBE_RANDOM_BLOCK)
+            result['seq_read'] = probe_sequential(path, size, time_limit, write=False, deadline=deadline)
+            if deadline_passed(deadline):
+                result['error'] = timeout
+                return result
+            result['rand_read'] = probe_random(path, size, time_limit, write=False, deadline=deadline)
+        except OSError as e:
+            result['error'] = str(e)
+        return result
+
+    free = psutil.disk_usage(partition.mountpoint).free
+    if free < 2 * size:
+        result['error'] = f"espacio libre insuficiente ({round(free / (1024 ** 2))} MB)"
+        return result
+    path = os.path.join(partition.mountpoint, PROBE_FILE_NAME.format(pid=os.getpid()))
+    try:
+        result['seq_write'] = probe_sequential(path, size, time_limit, write=True, deadline=deadline)
+        # Si la escritura se cortó por tiempo, el resto de pruebas usan lo que se escribió
+        size = result['seq_write']['bytes'] // PROBE_BLOCK * PROBE_BLOCK
+        if size == 0:
+            result['error'] = "no se pudo escribir ni un bloque dentro del límite de tiempo"
+            return result
+        for key, test, write in (('seq_read', probe_sequential, False),
+                                 ('rand_read', probe_random, False),
+                                 ('rand_write', probe_random, True)):
+            if deadline_passed(deadline):
+                result['error'] = timeout
+                break
+            result[key] = test(path, size, time_limit, write=write, deadline=deadline)
+    except OSError as e:
+        result['error'] = str(e)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return result
+
+def format_probe_result(result):
+    lines = [f"{result['device']} ({result['mountpoint']}, {result['fstype']}):"]
+    for key, name in (('seq_write', 'Escritura secuencial'), ('seq_read', 'Lectura secuencial')):
+        if key in result:
+            test = result[key]
+            lines.append(f"  {name}: {test['mb_per_sec']:.1f} MB/s{'' if test['direct'] else ' (sin O_DIRECT)'}")
+    for key, name in (('rand_read', 'Lectura aleatoria 4K'), ('rand_write', 'Escritura aleatoria 4K')):
+        if key in result:
+            test = result[key]
+            latency = test['latency_ms']
+            lines.append(f"  {name}: {test['iops']:.0f} IOPS, latencia p50 {latency['p50']:.2f} ms, "
+                         f"p95 {latency['p95']:.2f} ms, p99 {latency['p99']:.2f} ms")
+    if 'error' in result:
+        lines.append(f"  Error: {result['error']}")
+    return "\n".join(lines)
+
+def run_probe(args):
+    size = min(args.size_mb, PROBE_MAX_MB) * 1024 * 1024
+    time_limit = min(args.time_limit, PROBE_MAX_SECONDS)
+    # Plazo global: sin él, muchos montajes multiplicarían el límite por prueba
+    deadline = time.perf_counter() + min(args.total_time_limit, PROBE_MAX_TOTAL_SECONDS)
+    results = []
+    selected = select_probe_mounts(args.mount, args.include_network, args.include_readonly)
+    found = {partition.mountpoint for partition, _ in selected}
+    for mount in args.mount or []:
+        if mount not in found:
+            print(f"{mount}: no es un punto de montaje", file=sys.stderr)
+    if not selected:
+        print("Ningún punto de montaje coincide con los indicados", file=sys.stderr)
+        sys.exit(1)
+    for partition, reason in selected:
+        if not reason and deadline_passed(deadline):
+            reason = "límite de tiempo total alcanzado"
+        if reason:
+            if args.format == 'table':
+                print(f"{partition.device} ({partition.mountpoint}): omitido, {reason}")
+            continue
+        result = probe_mount(partition, size, time_limit, deadline)
+        results.append(result)
+        if args.format == 'table':
+            print(format_probe_result(result))
+    if args.format == 'json':
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+
+def print_report():
+    # Si hay un publicador en marcha se reutilizan sus datos en lugar de recogerlos
+    snapshot = read_shared_snapshot()
+
+    def shared(key, collect):
+        # Un publicador de una versión anterior puede no incluir todos los campos
+        return snapshot[key] if snapshot and key in snapshot else collect()
+
     print("\n" + "="*50)
     print("INFORMACIÓN COMPLETA DEL SISTEMA".center(50))
     print("="*50)
@@ -186,10 +2445,21 @@ def main():
     print("  Procesador: " + get_cpu_info())
     print(f"  Núcleos físicos: {psutil.cpu_count(logical=False)}")
     print(f"  Núcleos lógicos: {psutil.cpu_count(logical=True)}")
-    print("  Temperatura: " + get_system_temperature())
+    if platform.system() == "Linux":
+        effective = shared('effective_cpus', lambda: get_effective_cpus(get_cgroup_limits()))
+        if effective != psutil.cpu_count(logical=True):
+            print(f"  Núcleos efectivos (cgroup/afinidad): {round(effective, 2)}")
+    if snapshot:
+        temps = snapshot['temperatures']
+        print("  Temperatura: " + (", ".join(f"{name}: {t}°C" for name, t in temps.items()) if temps else "No disponible"))
+    else:
+        print("  Temperatura: " + get_system_temperature())
+    if platform.system() == "Linux":
+        print("  Topología:")
+        print("    " + format_topology_tree(get_cpu_topology(), get_numa_memory()).replace("\n", "\n  "))
     
     print("\n[+] GPU:")
-    gpu_info = get_gpu_info()
+    gpu_info = snapshot['gpu'] if snapshot else get_gpu_info()
     # Este bloque se mantiene para ofrecer sugerencias si la detección falla
     if "No se pudo detectar" in gpu_info:
         print("  " + gpu_info)
@@ -201,19 +2471,42 @@ def main():
         print("  " + gpu_info)
     
     print("\n[+] Memoria RAM:")
-    print("  " + get_memory_info())
+    print("  " + get_memory_info(snapshot))
     
     print("\n[+] Almacenamiento:")
-    print("  " + get_disk_info())
+    print("  " + get_disk_info(snapshot))
     
     print("\n[+] Red:")
-    print("  " + get_network_info())
+    print("  " + shared('network', get_network_info))
+
+    if platform.system() == "Linux":
+        print("\n[+] Energía:")
+        if snapshot and 'batteries' in snapshot:
+            # La muestra del publicador ya trae la potencia: no hace falta esperar otra lectura
+            print("  " + format_power_info(snapshot['sample'], snapshot['batteries']))
+        else:
+            print("  " + get_power_info())
+
+    registry = get_collector_registry()
+    for name, result in registry.collect().items():
+        spec = registry.specs[name]
+        print(f"\n[+] {spec.title or name}:")
+        print("  " + (f"Error: {registry.errors[name]}" if name in registry.errors else format_plugin_result(result)))
     
+    if platform.system() == "Linux":
+        print("\n[+] Contenedor (cgroup v2):")
+        print("  " + shared('container', get_container_info))
+
+        print("\n[+] Presión de recursos (PSI):")
+        print("  " + shared('pressure', get_pressure_info))
+
     print("\n[+] Tiempo de actividad:")
     print("  " + get_uptime())
     
     print("\n" + "="*50)
     print(f"Reporte generado el: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if snapshot:
+        print("Datos de memoria, disco, temperatura, GPU, red, energía, cgroup y PSI leídos del publicador compartido")
     print("="*50)
 
     if platform.system() == "Windows":
@@ -221,5 +2514,73 @@ def main():
     else:
         input("\nPresiona Enter para salir...")
 
+def build_parser():
+    parser = argparse.ArgumentParser(prog='sysfo', description="Sistema para mostrar la información del sistema")
+    commands = parser.add_subparsers(dest='command')
+
+    watch = commands.add_parser('watch', help="Vigila reglas de alerta sobre las métricas del sistema")
+    watch.add_argument('--rule', action='append', help="Regla, p. ej. 'cpu_temp > 90 for 30s' (repetible)")
+    watch.add_argument('--rules-file', help="Archivo con una regla por línea")
+    watch.add_argument('--interval', type=float, default=5, help="Segundos entre muestras (por defecto 5)")
+    watch.add_argument('--log', help="Archivo donde registrar las alertas")
+    watch.add_argument('--webhook', help="URL local a la que enviar las alertas por POST")
+    watch.set_defaults(func=run_watch)
+
+    record = commands.add_parser('record', help="Guarda muestras periódicas en el historial SQLite")
+    record.add_argument('--db', default=DEFAULT_DB_PATH, help=f"Base de datos (por defecto {DEFAULT_DB_PATH})")
+    record.add_argument('--interval', type=float, default=5, help="Segundos entre muestras (por defecto 5)")
+    record.set_defaults(func=run_record)
+
+    query = commands.add_parser('query', help="Percentiles y máximos del historial guardado")
+    query.add_argument('--db', default=DEFAULT_DB_PATH, help=f"Base de datos (por defecto {DEFAULT_DB_PATH})")
+    query.add_argument('--since', type=parse_duration, default=86400, help="Rango hacia atrás, p. ej. 30m, 24h, 7d (por defecto 24h)")
+    query.add_argument('--start', help="Inicio del rango (ISO 8601 o timestamp); tiene prioridad sobre --since")
+    query.add_argument('--end', help="Fin del rango (ISO 8601 o timestamp; por defecto ahora)")
+    query.add_argument('--metric', action='append', help="Métrica o patrón, p. ej. 'disk_percent:*' (repetible)")
+    query.add_argument('--threshold', action='append', help="Umbral para 't>umbral', p. ej. cpu_percent=80 (repetible)")
+    query.add_argument('--raw', action='store_true', help="Usar siempre las muestras crudas en lugar de los resúmenes")
+    query.add_argument('--format', choices=['table', 'json'], default='table', help="Formato de salida")
+    query.set_defaults(func=run_query)
+
+    bench = commands.add_parser('bench', help="Benchmark de CPU y memoria comparado con una referencia")
+    bench.add_argument('--duration', type=float, default=2, help="Segundos por cada paso de la curva de escalado (por defecto 2)")
+    bench.add_argument('--memory-mb', type=int, default=BENCH_MEMORY_MB, help=f"Tamaño de los buffers de memoria (por defecto {BENCH_MEMORY_MB})")
+    bench.add_argument('--baseline', default=BENCH_BASELINE_PATH, help=f"Archivo de referencias (por defecto {BENCH_BASELINE_PATH})")
+    bench.add_argument('--save-baseline', action='store_true', help="Guardar este resultado como referencia del modelo de CPU")
+    bench.set_defaults(func=run_bench)
+
+    probe = commands.add_parser('probe', help="Mide rendimiento y latencia de cada punto de montaje")
+    probe.add_argument('--mount', action='append', help="Punto de montaje a probar (repetible; por defecto todos)")
+    probe.add_argument('--size-mb', type=int, default=256, help=f"Tamaño del archivo de prueba (por defecto 256, máximo {PROBE_MAX_MB})")
+    probe.add_argument('--time-limit', type=float, default=5, help=f"Segundos máximos por prueba (por defecto 5, máximo {PROBE_MAX_SECONDS})")
+    probe.add_argument('--total-time-limit', type=float, default=60,
+                       help=f"Segundos máximos de toda la ejecución (por defecto 60, máximo {PROBE_MAX_TOTAL_SECONDS})")
+    probe.add_argument('--include-network', action='store_true', help="Probar también sistemas de archivos de red")
+    probe.add_argument('--include-readonly', action='store_true', help="Probar lecturas en montajes de solo lectura")
+    probe.add_argument('--format', choices=['table', 'json'], default='table', help="Formato de salida")
+    probe.set_defaults(func=run_probe)
+
+    publish = commands.add_parser('publish', help="Publica instantáneas en memoria compartida para otros procesos locales")
+    publish.add_argument('--interval', type=float, default=2, help="Segundos entre instantáneas (por defecto 2)")
+    publish.add_argument('--name', default=SHM_NAME, help=f"Nombre del segmento compartido (por defecto {SHM_NAME})")
+    publish.set_defaults(func=run_publish)
+
+    plugins = commands.add_parser('plugins', help=f"Lista los colectores externos (activar con {PLUGIN_ENV}=a,b o 'all')")
+    plugins.add_argument('--run', action='store_true', help="Ejecutar los colectores activados y mostrar su resultado")
+    plugins.set_defaults(func=run_plugins)
+
+    topology = commands.add_parser('topology', help="Muestra sockets, nodos NUMA, núcleos, hilos y cachés")
+    topology.add_argument('--detail', action='store_true', help="Listar cada núcleo con sus hilos")
+    topology.add_argument('--format', choices=['table', 'json'], default='table', help="Formato de salida")
+    topology.set_defaults(func=run_topology)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        print_report()
+    else:
+        args.func(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,15 +3,26 @@ import psutil
 import os
 import subprocess
 import time
+from array import array
 from datetime import timedelta
+from types import SimpleNamespace
 from kivy.app import App
 from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.widget import Widget
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recyclegridlayout import RecycleGridLayout
+from kivy.graphics import Color, Line, Rectangle
+from kivy.properties import NumericProperty
 from kivy.core.window import Window
 from kivy.utils import get_color_from_hex
+from Sysfo import (AlertEngine, DEFAULT_ALERT_RULES, stdout_alert_sink, attach_snapshot, CPU_SENSOR_CHIPS,
+                   get_collector_registry, format_plugin_result, PowerMonitor, get_temperature_readings,
+                   tracks_disk_usage, get_cpu_temperature, get_cpu_package_temperature, get_core_temperatures,
+                   get_cpu_topology, get_numa_memory, format_topology_tree, format_cpu_list)
 
 # Se añade la importación de WMI para las temperaturas en Windows.
 # Es opcional, por lo que se encapsula en un try-except.
@@ -20,6 +31,265 @@ try:
 except ImportError:
     wmi = None
 
+ROW_HEIGHT = 26       # Alto de cada fila en las listas virtualizadas
+CORE_COLUMNS = 4      # Columnas del mapa de núcleos
+MAX_LIST_HEIGHT = 260 # Alto máximo de cada lista; el resto se recorre con scroll
+HISTORY_LENGTH = 120  # Muestras guardadas por cada gráfica
+CHART_INTERVAL = 1    # Segundos entre muestras de las gráficas
+CHART_HEIGHT = 48
+LABEL_INTERVAL = 5    # Segundos entre refrescos del texto con la ventana visible
+GPU_INTERVAL = 600    # La lista de GPUs casi nunca cambia; no se lanza lspci en cada refresco
+
+# Umbrales que, al superarse, devuelven el muestreo a su ritmo normal
+HOT_THRESHOLDS = {'cpu': 85, 'memory': 90, 'temp': 80}
+
+# Sección que se resalta cuando salta una alerta sobre cada métrica
+ALERT_SECTIONS = {'cpu': 'CPU', 'mem': 'Memoria', 'disk': 'Disco'}
+HEADER_COLOR = '#A3BE8C'
+ALERT_COLOR = '#BF616A'
+
+
+def heat_color(usage):
+    """Devuelve un color RGBA que va de verde (0%) a rojo (100%)."""
+    ratio = max(0.0, min(usage, 100.0)) / 100.0
+    return (0.64 + 0.27 * ratio, 0.75 - 0.37 * ratio, 0.55 - 0.13 * ratio, 1)
+
+
+class CoreBar(Label):
+    """
+    Celda del mapa de núcleos. La barra se dibuja en el canvas y solo se
+    actualiza su geometría, así que RecycleView puede reutilizar la celda
+    para cualquier núcleo sin crear widgets nuevos.
+    """
+    cpu = NumericProperty(0)
+    usage = NumericProperty(0)
+    # Temperatura del núcleo físico; None si no hay sensor por núcleo
+    temperature = NumericProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.font_size = 12
+        self.color = get_color_from_hex('#2E3440')
+        with self.canvas.before:
+            Color(*get_color_from_hex('#4C566A'))
+            self._bg = Rectangle()
+            self._bar_color = Color(*heat_color(0))
+            self._bar = Rectangle()
+        self.bind(pos=self._update_bar, size=self._update_bar, usage=self._update_bar)
+        self.bind(cpu=self._update_text, usage=self._update_text, temperature=self._update_text)
+
+    def _update_text(self, *args):
+        text = f"{self.cpu}: {self.usage}%"
+        if self.temperature is not None:
+            text += f" · {self.temperature:.0f}°C"
+        self.text = text
+
+    def _update_bar(self, *args):
+        self._bg.pos = self.pos
+        self._bg.size = self.size
+        self._bar.pos = self.pos
+        self._bar.size = (self.width * max(0, min(self.usage, 100)) / 100.0, self.height)
+        self._bar_color.rgba = heat_color(self.usage)
+
+
+class ListRow(Label):
+    """Fila de texto reutilizable para las listas de discos e interfaces."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.font_size = 14
+        self.color = get_color_from_hex('#E5E9F0')
+        self.halign = 'left'
+        self.valign = 'middle'
+        self.bind(size=self.setter('text_size'))
+
+
+class DataList(RecycleView):
+    """
+    Lista virtualizada: solo existen widgets para las filas visibles y
+    actualizar 'data' reutiliza esas mismas filas.
+    """
+
+    def __init__(self, viewclass, columns=1, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = viewclass
+        self.columns = columns
+        self.size_hint_y = None
+        self.bar_width = 8
+        if columns > 1:
+            layout = RecycleGridLayout(cols=columns, spacing=4, default_size=(None, ROW_HEIGHT),
+                                       default_size_hint=(1, None), size_hint_y=None)
+        else:
+            layout = RecycleBoxLayout(orientation='vertical', default_size=(None, ROW_HEIGHT),
+                                      default_size_hint=(1, None), size_hint_y=None)
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+
+    def set_rows(self, rows):
+        self.data = rows
+        visible_rows = (len(rows) + self.columns - 1) // self.columns
+        self.height = min(max(visible_rows, 1) * (ROW_HEIGHT + 4), MAX_LIST_HEIGHT)
+
+
+class RingBuffer:
+    """Buffer circular de tamaño fijo para series numéricas."""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = array('d', [0.0] * size)
+        self.head = 0   # Posición donde se escribirá la siguiente muestra
+        self.count = 0
+
+    def append(self, value):
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # Recorre de la muestra más antigua a la más reciente
+        start = (self.head - self.count) % self.size
+        for i in range(self.count):
+            yield self.values[(start + i) % self.size]
+
+    def last(self):
+        return self.values[(self.head - 1) % self.size] if self.count else 0.0
+
+    def max(self):
+        return max(self) if self.count else 0.0
+
+
+class Sparkline(Widget):
+    """
+    Gráfica de una serie. La instrucción Line se crea una sola vez y en cada
+    redibujado solo se reescriben sus vértices a partir del RingBuffer.
+    """
+
+    def __init__(self, history, fixed_max=None, line_color='#88C0D0', **kwargs):
+        super().__init__(**kwargs)
+        self.history = history
+        self.fixed_max = fixed_max  # None = escala automática según el máximo visible
+        self._points = [0.0] * (2 * history.size)
+        with self.canvas:
+            Color(*get_color_from_hex('#3B4252'))
+            self._bg = Rectangle()
+            Color(*get_color_from_hex(line_color))
+            self._line = Line(points=[], width=1.2)
+        self.bind(pos=self._update_bg, size=self._update_bg)
+
+    def _update_bg(self, *args):
+        self._bg.pos = self.pos
+        self._bg.size = self.size
+        self.redraw()
+
+    def redraw(self):
+        count = len(self.history)
+        if count < 2:
+            self._line.points = []
+            return
+        top = self.fixed_max or self.history.max() or 1.0
+        step = self.width / (self.history.size - 1)
+        x0 = self.x + self.width - step * (count - 1)
+        points = self._points
+        for i, value in enumerate(self.history):
+            points[2 * i] = x0 + step * i
+            points[2 * i + 1] = self.y + self.height * min(value / top, 1.0)
+        self._line.points = points[:2 * count]
+
+
+class ChartRow(BoxLayout):
+    """Título con el valor actual a la izquierda y la gráfica a la derecha."""
+
+    def __init__(self, title, unit, fixed_max=None, **kwargs):
+        super().__init__(orientation='horizontal', size_hint_y=None, height=CHART_HEIGHT, spacing=10, **kwargs)
+        self.title = title
+        self.unit = unit
+        self.history = RingBuffer(HISTORY_LENGTH)
+        self.available = True
+        self.label = Label(
+            text=title,
+            font_size=14,
+            color=get_color_from_hex('#E5E9F0'),
+            size_hint_x=0.3,
+            halign='left',
+            valign='middle'
+        )
+        self.label.bind(size=self.label.setter('text_size'))
+        self.chart = Sparkline(self.history, fixed_max=fixed_max, size_hint_x=0.7)
+        self.add_widget(self.label)
+        self.add_widget(self.chart)
+
+    def push(self, value):
+        if value is None:
+            self.available = False
+            return
+        self.available = True
+        self.history.append(value)
+
+    def redraw(self):
+        if self.available:
+            self.label.text = f"{self.title}: {self.history.last():.1f} {self.unit}"
+        else:
+            self.label.text = f"{self.title}: N/D"
+        self.chart.redraw()
+
+
+class AdaptiveInterval:
+    """
+    Calcula el intervalo hasta la siguiente muestra. Se alarga mientras los
+    valores se mantienen estables, con la ventana oculta o funcionando con
+    batería, y vuelve al intervalo base si algo cambia rápido o supera un umbral.
+    """
+    STABLE_CHANGE = 2.0   # Variación (puntos de %) por debajo de la cual se considera estable
+    FAST_CHANGE = 10.0    # Variación a partir de la cual se vuelve al intervalo base
+    GROWTH = 1.5
+    HIDDEN_FACTOR = 6
+    BATTERY_FACTOR = 2
+
+    def __init__(self, base, maximum):
+        self.base = base
+        self.maximum = maximum
+        self.current = base
+        self.last_values = {}
+
+    def reset(self):
+        self.current = self.base
+
+    def largest_change(self, values):
+        change = 0.0
+        for key, value in values.items():
+            previous = self.last_values.get(key)
+            if value is None or previous is None:
+                continue
+            if key in ('net', 'disk', 'power'):
+                # El caudal se compara en relativo (porcentaje respecto al anterior)
+                change = max(change, abs(value - previous) * 100 / max(previous, 1.0))
+            else:
+                change = max(change, abs(value - previous))
+        return change
+
+    def next_interval(self, values, visible=True, on_battery=False):
+        change = self.largest_change(values)
+        hot = any(values.get(key) is not None and values[key] >= limit
+                  for key, limit in HOT_THRESHOLDS.items())
+        self.last_values = dict(values)
+
+        if hot or change >= self.FAST_CHANGE:
+            self.current = self.base
+        elif change < self.STABLE_CHANGE:
+            self.current = min(self.current * self.GROWTH, self.maximum)
+
+        interval = self.current
+        if on_battery:
+            interval *= self.BATTERY_FACTOR
+        if not visible:
+            interval *= self.HIDDEN_FACTOR
+        return interval
+
+
 class SystemInfoGUI(BoxLayout):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -43,49 +313,289 @@ class SystemInfoGUI(BoxLayout):
         self.scroll.add_widget(self.content)
         self.add_widget(self.scroll)
 
+        # Los widgets se crean una sola vez; cada refresco solo cambia su contenido
+        self.section_labels = {}
+        self.section_headers = {}
+        self.lists = {
+            'Núcleos': DataList(CoreBar, columns=CORE_COLUMNS),
+            'Discos': DataList(ListRow),
+            'Interfaces': DataList(ListRow),
+            'Mapa de núcleos': DataList(ListRow, columns=CORE_COLUMNS),
+        }
+        self.build_charts()
+        self.build_sections()
+        self.fill_topology_grid()
+
+        # El redibujado de las gráficas se agrupa en como mucho uno por frame
+        # y se suspende mientras la ventana está minimizada u oculta.
+        self.window_visible = True
+        self.charts_dirty = False
+        self._redraw_trigger = Clock.create_trigger(self.redraw_charts)
+        Window.bind(on_minimize=self.on_window_hidden, on_hide=self.on_window_hidden,
+                    on_restore=self.on_window_shown, on_show=self.on_window_shown)
+        self._last_io = None
+        self.power_monitor = PowerMonitor() if platform.system() == 'Linux' else None
+        self.power_metrics = {}
+
+        # Cada bucle se reprograma a sí mismo con un intervalo adaptativo
+        self.chart_poll = AdaptiveInterval(CHART_INTERVAL, 10)
+        self.label_poll = AdaptiveInterval(LABEL_INTERVAL, 60)
+        self.latest_sample = {}
+        self.on_battery = False
+        self._chart_event = None
+        self._label_event = None
+        self._gpu_cache = None
+
+        # Si hay un 'sysfo publish' en marcha se leen sus instantáneas en lugar de consultar el sistema
+        self.snapshot_reader = None
+        self.snapshot = None
+        self.temperatures = {}
+
+        # Las alertas se muestran resaltando en rojo el título de la sección afectada
+        self.active_alerts = {}
+        self.alerts = AlertEngine(DEFAULT_ALERT_RULES, [stdout_alert_sink, self.on_alert])
+
+        # Las gráficas primero: el texto de la CPU usa su última muestra
+        self.sample_charts()
+        self.refresh_labels()
+
+    def build_charts(self):
+        self.charts = {
+            'cpu': ChartRow('CPU', '%', fixed_max=100),
+            'memory': ChartRow('Memoria', '%', fixed_max=100),
+            'net': ChartRow('Red', 'KB/s'),
+            'disk': ChartRow('Disco', 'KB/s'),
+            'temp': ChartRow('Temperatura', '°C'),
+            'power': ChartRow('Potencia', 'W'),
+        }
+        self.add_header('Historial')
+        for chart in self.charts.values():
+            self.content.add_widget(chart)
+        self.content.add_widget(Widget(size_hint_y=None, height=10))
+
+    def sample_charts(self):
+        self.snapshot = self.read_snapshot()
+        sample = self.get_chart_sample()
+        if sample is None:
+            # El publicador aún no ha generado una instantánea nueva
+            self._chart_event = Clock.schedule_once(lambda dt: self.sample_charts(), self.chart_poll.current)
+            return
+        self.latest_sample = sample
+        self.alerts.evaluate({
+            'time': time.time(),
+            'cpu_percent': sample['cpu'],
+            'mem_percent': sample['memory'],
+            'mem_available_gb': sample['mem_available_gb'],
+            'cpu_temp': sample['temp'],
+        })
+        for key, chart in self.charts.items():
+            chart.push(sample.get(key))
+        self.charts_dirty = True
+        if self.window_visible:
+            self._redraw_trigger()
+
+        interval = self.chart_poll.next_interval(sample, self.window_visible, self.on_battery)
+        self._chart_event = Clock.schedule_once(lambda dt: self.sample_charts(), interval)
+
+    def redraw_charts(self, *args):
+        if not self.window_visible or not self.charts_dirty:
+            return
+        self.charts_dirty = False
+        for chart in self.charts.values():
+            chart.redraw()
+
+    def on_window_hidden(self, *args):
+        self.window_visible = False
+
+    def on_window_shown(self, *args):
+        if self.window_visible:
+            return
+        self.window_visible = True
+        # Al volver a mostrarse se actualiza todo de inmediato y se recupera el ritmo normal
+        for event in (self._chart_event, self._label_event):
+            if event:
+                event.cancel()
+        self.chart_poll.reset()
+        self.label_poll.reset()
+        self.sample_charts()
         self.refresh_labels()
-        Clock.schedule_interval(lambda dt: self.refresh_labels(), 5)
+
+    def read_snapshot(self):
+        if self.snapshot_reader is None:
+            self.snapshot_reader = attach_snapshot()
+            if self.snapshot_reader is None:
+                return None
+        snapshot = self.snapshot_reader.read()
+        if snapshot is None:
+            # Publicador detenido: se vuelve a intentar la conexión más adelante
+            self.snapshot_reader.close()
+            self.snapshot_reader = None
+        return snapshot
+
+    def get_chart_sample(self):
+        if self.snapshot:
+            shared = self.snapshot['sample']
+            now = self.snapshot['time']
+            if self._last_io and self._last_io[0] == now:
+                return None
+            net_bytes = shared['net_bytes_sent'] + shared['net_bytes_recv'] if 'net_bytes_sent' in shared else None
+            disk_bytes = shared['disk_read_bytes'] + shared['disk_write_bytes'] if 'disk_read_bytes' in shared else None
+            sample = {
+                'cpu': shared['cpu_percent'],
+                'memory': shared['mem_percent'],
+                'mem_available_gb': shared['mem_available_gb'],
+                'temp': shared.get('cpu_temp'),
+            }
+            self.power_metrics = {k: v for k, v in shared.items() if k.startswith(('power_', 'battery_'))}
+        else:
+            now = time.time()
+            net = psutil.net_io_counters()
+            disk = psutil.disk_io_counters()
+            net_bytes = net.bytes_sent + net.bytes_recv if net else None
+            disk_bytes = disk.read_bytes + disk.write_bytes if disk else None
+
+            mem = psutil.virtual_memory()
+            sample = {
+                'cpu': psutil.cpu_percent(),
+                'memory': mem.percent,
+                'mem_available_gb': mem.available / (1024 ** 3),
+                'temp': self.get_max_temperature(),
+            }
+            self.power_metrics = self.power_monitor.sample(now) if self.power_monitor else {}
+        sample['power'] = self.get_power_watts()
+        # El caudal se calcula como diferencia entre dos lecturas de los contadores
+        if self._last_io:
+            last_time, last_net, last_disk = self._last_io
+            elapsed = max(now - last_time, 1e-6)
+            if net_bytes is not None and last_net is not None:
+                sample['net'] = max(net_bytes - last_net, 0) / elapsed / 1024
+            if disk_bytes is not None and last_disk is not None:
+                sample['disk'] = max(disk_bytes - last_disk, 0) / elapsed / 1024
+        self._last_io = (now, net_bytes, disk_bytes)
+        return sample
+
+    def get_max_temperature(self):
+        # Solo se usa psutil: consultar WMI cada segundo resulta demasiado costoso
+        if not hasattr(psutil, "sensors_temperatures"):
+            return None
+        try:
+            temps = psutil.sensors_temperatures()
+        except Exception:
+            return None
+        # Solo sensores del procesador; NVMe, GPU o wifi no cuentan como temperatura de CPU
+        readings = [t.current for chip, entries in temps.items() if chip in CPU_SENSOR_CHIPS
+                    for t in entries if t.current]
+        return max(readings) if readings else None
+
+    def add_header(self, section):
+        header = Label(
+            text=f"[b]{section.upper()}[/b]",
+            markup=True,
+            font_size=18,
+            color=get_color_from_hex(HEADER_COLOR),
+            size_hint_y=None,
+            height=30
+        )
+        self.section_headers[section] = header
+        self.content.add_widget(header)
+
+    def on_alert(self, event):
+        section = ALERT_SECTIONS.get(event.rule.metric.split('_')[0])
+        if section is None:
+            return
+        key = (event.rule.text, event.series)
+        if event.state == 'firing':
+            self.active_alerts[key] = section
+        else:
+            self.active_alerts.pop(key, None)
+        alerting = section in self.active_alerts.values()
+        self.section_headers[section].color = get_color_from_hex(ALERT_COLOR if alerting else HEADER_COLOR)
+
+    def build_sections(self):
+        # Las listas van justo después de la sección de texto a la que pertenecen
+        list_after = {'CPU': 'Núcleos', 'Topología': 'Mapa de núcleos', 'Disco': 'Discos', 'Red': 'Interfaces'}
+        for section in self.get_section_names():
+            self.add_header(section)
+            if section in ('Disco', 'Red'):
+                # Estas secciones son solo listas, no llevan texto
+                label = None
+            else:
+                label = Label(
+                    text='',
+                    font_size=14,
+                    color=get_color_from_hex('#E5E9F0'),
+                    size_hint_y=None,
+                    height=self.get_label_height('', 14),
+                    line_height=1.2 # Mejora la legibilidad en textos multilínea
+                )
+                self.section_labels[section] = label
+                self.content.add_widget(label)
+            if section in list_after:
+                self.content.add_widget(self.lists[list_after[section]])
+            self.content.add_widget(Widget(size_hint_y=None, height=10))
 
     def refresh_labels(self):
-        self.content.clear_widgets()
+        self.on_battery = self.is_on_battery()
+        self.snapshot = self.read_snapshot()
+        # Se leen una vez por refresco: el texto de la CPU y el mapa de núcleos las comparten
+        self.temperatures = self.get_temperatures()
         sys_info = self.get_system_info()
         for section, data in sys_info.items():
-            self.content.add_widget(Label(
-                text=f"[b]{section.upper()}[/b]",
-                markup=True,
-                font_size=18,
-                color=get_color_from_hex('#A3BE8C'),
-                size_hint_y=None,
-                height=30
-            ))
-
-            self.content.add_widget(Label(
-                text=data,
-                font_size=14,
-                color=get_color_from_hex('#E5E9F0'),
-                size_hint_y=None,
-                height=self.get_label_height(data, 14),
-                line_height=1.2 # Mejora la legibilidad en textos multilínea
-            ))
+            label = self.section_labels[section]
+            if label.text != data:
+                label.text = data
+                label.height = self.get_label_height(data, 14)
 
-            self.content.add_widget(Widget(size_hint_y=None, height=10))
+        # Las temperaturas por núcleo van en su celda, no en el texto de la CPU:
+        # así la lista sigue virtualizada aunque haya cientos de núcleos
+        core_temperatures = get_core_temperatures(self.temperatures, get_cpu_topology())
+        self.lists['Núcleos'].set_rows([
+            {'cpu': i, 'usage': usage, 'temperature': core_temperatures.get(i)}
+            for i, usage in enumerate(self.get_cpu_core_usage())
+        ])
+        self.lists['Discos'].set_rows([{'text': row} for row in self.get_disk_info()])
+        self.lists['Interfaces'].set_rows([{'text': row} for row in self.get_network_info()])
+
+        self.alerts.evaluate(dict(self.disk_percents, time=time.time()))
+
+        interval = self.label_poll.next_interval(
+            {key: self.latest_sample.get(key) for key in ('cpu', 'memory', 'temp')},
+            self.window_visible, self.on_battery)
+        self._label_event = Clock.schedule_once(lambda dt: self.refresh_labels(), interval)
 
     def get_label_height(self, text, font_size):
         lines = text.count('\n') + 1
         return lines * (font_size + 12) # Ajustado para el line_height
 
+    def get_section_names(self):
+        # Los colectores externos activados se añaden como secciones propias
+        plugins = [spec.title or spec.name for spec in get_collector_registry().enabled_specs()]
+        return (['Sistema Operativo', 'CPU', 'Topología', 'GPU', 'Memoria', 'Disco', 'Red'] + plugins
+                + ['Batería', 'Tiempo de Actividad'])
+
     def get_system_info(self):
-        # La 'Temperatura' se elimina de aquí porque ahora está dentro de 'CPU'
-        return {
+        # La 'Temperatura' se elimina de aquí porque ahora está dentro de 'CPU'.
+        # Disco y Red no aparecen porque se muestran como listas virtualizadas.
+        info = {
             'Sistema Operativo': self.get_os_info(),
             'CPU': self.get_cpu_info(),
+            'Topología': self.get_topology_info(),
             'GPU': self.get_gpu_info(),
             'Memoria': self.get_memory_info(),
-            'Disco': self.get_disk_info(),
-            'Red': self.get_network_info(),
             'Batería': self.get_battery_info(),
             'Tiempo de Actividad': self.get_uptime_info()
         }
+        info.update(self.get_plugin_info())
+        return info
+
+    def get_plugin_info(self):
+        registry = get_collector_registry()
+        info = {}
+        for name, result in registry.collect().items():
+            spec = registry.specs[name]
+            error = registry.errors.get(name)
+            info[spec.title or name] = f"Error: {error}" if error else format_plugin_result(result).replace('\n  ', '\n')
+        return info
 
     def get_windows_info(self):
         version_info = platform.version()
@@ -143,27 +653,21 @@ class SystemInfoGUI(BoxLayout):
             
             physical = psutil.cpu_count(logical=False)
             logical = psutil.cpu_count(logical=True)
-            total_usage = psutil.cpu_percent()
-            per_core_usage = psutil.cpu_percent(percpu=True)
+            # psutil.cpu_percent() guarda una única referencia global: solo lo llama
+            # el bucle de las gráficas y aquí se reutiliza su última muestra
+            total_usage = self.latest_sample.get('cpu', 0.0)
             
+            # El uso por núcleo se dibuja aparte en el mapa de núcleos (get_cpu_core_usage)
             cpu_info_str = (f"{name}\n"
                             f"Núcleos: {physical} físicos, {logical} lógicos\n"
-                            f"Uso total: {total_usage}%\n")
-            
-            core_usage_str = "\n".join([f"  · Uso Núcleo {i}: {usage}%" for i, usage in enumerate(per_core_usage)])
-            cpu_info_str += core_usage_str
+                            f"Uso total: {total_usage}%")
 
             # --- Información de Temperatura ---
-            temp_str = "\nTemperaturas:"
-            temps_found = False
-            
+            # Solo el paquete y el máximo: la lectura de cada núcleo está en el mapa de núcleos
+            package = hottest = None
             if platform.system() == 'Linux':
-                if hasattr(psutil, "sensors_temperatures"):
-                    temps = psutil.sensors_temperatures()
-                    if 'coretemp' in temps:
-                        for i, core in enumerate(temps['coretemp']):
-                            temp_str += f"\n  · {core.label}: {core.current}°C"
-                        temps_found = True
+                package = get_cpu_package_temperature(self.temperatures)
+                hottest = get_cpu_temperature(self.temperatures)
 
             elif platform.system() == 'Windows':
                 if wmi:
@@ -172,23 +676,49 @@ class SystemInfoGUI(BoxLayout):
                         sensors = wmi_instance.Sensor()
                         cpu_temps = [s for s in sensors if s.SensorType == 'Temperature' and 'CPU' in s.Name]
                         if cpu_temps:
-                            for sensor in cpu_temps:
-                                temp_str += f"\n  · {sensor.Name}: {sensor.Value}°C"
-                            temps_found = True
+                            hottest = max(sensor.Value for sensor in cpu_temps)
+                            package = next((s.Value for s in cpu_temps if 'Package' in s.Name), None)
                     except Exception:
                         pass # Falla si OHM no está corriendo
 
-            if temps_found:
-                cpu_info_str += temp_str
+            if hottest is None:
+                cpu_info_str += "\nTemperatura: No disponible"
+            elif package is not None:
+                cpu_info_str += f"\nTemperatura: paquete {package}°C, máxima {hottest}°C"
             else:
-                cpu_info_str += "\nTemperaturas: No disponibles"
+                cpu_info_str += f"\nTemperatura: máxima {hottest}°C"
 
             return cpu_info_str
 
         except Exception:
             return "Información de CPU no disponible"
 
+    def get_temperatures(self):
+        """{chip.sensor: °C}; con publicador se usan sus lecturas en lugar de consultar los sensores."""
+        if self.snapshot and 'temperatures' in self.snapshot:
+            return self.snapshot['temperatures']
+        return get_temperature_readings()
+
+    def get_cpu_core_usage(self):
+        if self.snapshot:
+            shared = self.snapshot['sample']
+            return [shared[f'cpu_core:{i}'] for i in range(len(shared)) if f'cpu_core:{i}' in shared]
+        try:
+            return psutil.cpu_percent(percpu=True)
+        except Exception:
+            return []
+
     def get_gpu_info(self):
+        if self.snapshot:
+            return self.snapshot['gpu']
+        now = time.monotonic()
+        if self._gpu_cache and now - self._gpu_cache[0] < GPU_INTERVAL:
+            return self._gpu_cache[1]
+        info = self.detect_gpus()
+        self._gpu_cache = (now, info)
+        return info
+
+    def detect_gpus(self):
         gpus = []
         try:
             if platform.system() == 'Windows':
@@ -204,7 +734,7 @@ class SystemInfoGUI(BoxLayout):
     # El método get_temperature_info() ha sido eliminado.
 
     def get_memory_info(self):
-        mem = psutil.virtual_memory()
+        mem = SimpleNamespace(**self.snapshot['memory']) if self.snapshot else psutil.virtual_memory()
         total = round(mem.total / (1024**3), 2)
         used = round(mem.used / (1024**3), 2)
         available = round(mem.available / (1024**3), 2)
@@ -214,17 +744,30 @@ class SystemInfoGUI(BoxLayout):
 
     def get_disk_info(self):
         disks = []
+        self.disk_percents = {}
+        if self.snapshot:
+            for disk in self.snapshot['disks']:
+                if disk['fstype']:
+                    if tracks_disk_usage(disk['fstype'], disk.get('opts', '')):
+                        self.disk_percents[f"disk_percent:{disk['mountpoint']}"] = disk['percent']
+                    disks.append(
+                        f"{disk['device']} ({disk['mountpoint']}): {round(disk['used'] / (1024 ** 3), 2)} / "
+                        f"{round(disk['total'] / (1024 ** 3), 2)} GB ({disk['percent']}%)"
+                    )
+            return disks
         for partition in psutil.disk_partitions():
             if partition.fstype:
                 try:
                     usage = psutil.disk_usage(partition.mountpoint)
+                    if tracks_disk_usage(partition.fstype, partition.opts):
+                        self.disk_percents[f'disk_percent:{partition.mountpoint}'] = usage.percent
                     disks.append(
                         f"{partition.device} ({partition.mountpoint}): {round(usage.used / (1024 ** 3), 2)} / "
                         f"{round(usage.total / (1024 ** 3), 2)} GB ({usage.percent}%)"
                     )
                 except PermissionError:
                     continue
-        return "\n".join(disks)
+        return disks
 
     def get_network_info(self):
         nets = []
@@ -232,7 +775,15 @@ class SystemInfoGUI(BoxLayout):
             for addr in addrs:
                 if addr.family == 2:
                     nets.append(f"{name}: {addr.address}")
-        return "\n".join(nets)
+        return nets
+
+    def get_power_watts(self):
+        # Potencia del paquete (RAPL) si se puede leer; si no, lo que entrega la batería
+        metrics = self.power_metrics
+        if 'power_package_watts' in metrics:
+            return metrics['power_package_watts']
+        drain = [v for k, v in metrics.items() if k.startswith('battery_watts:') and v > 0]
+        return sum(drain) if drain else None
 
     def get_battery_info(self):
         try:
@@ -242,13 +793,48 @@ class SystemInfoGUI(BoxLayout):
                           else "Calculando..." if battery.power_plugged else f"{round(battery.secsleft / 60)} min restantes")
                 estado = "Cargando" if battery.power_plugged else "Descargando"
                 
-                return (f"Porcentaje: {battery.percent}%\n"
+                info = (f"Porcentaje: {battery.percent}%\n"
                         f"Estado: {estado}\n"
                         f"Tiempo: {tiempo}")
+                # Datos de /sys/class/power_supply calculados por PowerMonitor
+                labels = (('battery_watts:', "Potencia", "{:.2f} W"),
+                          ('battery_drain_percent_per_hour:', "Descarga", "{:.1f} %/h"),
+                          ('battery_health_percent:', "Salud", "{}%"),
+                          ('battery_cycles:', "Ciclos", "{}"))
+                for prefix, name, pattern in labels:
+                    for key, value in self.power_metrics.items():
+                        if key.startswith(prefix):
+                            info += f"\n{name}: " + pattern.format(abs(value) if prefix == 'battery_watts:' else value)
+                if 'power_self_watts' in self.power_metrics:
+                    info += f"\nConsumo de Sysfo: {self.power_metrics['power_self_watts']:.3f} W"
+                return info
         except Exception:
             pass
         return "No disponible o no detectada"
 
+    def is_on_battery(self):
+        try:
+            battery = psutil.sensors_battery()
+            return bool(battery) and not battery.power_plugged
+        except Exception:
+            return False
+
+    def get_topology_info(self):
+        # La estructura se lee una sola vez (get_cpu_topology la guarda en caché);
+        # solo la memoria libre por nodo cambia entre refrescos
+        return format_topology_tree(get_cpu_topology(), get_numa_memory()).replace('\n  ', '\n')
+
+    def fill_topology_grid(self):
+        topology = get_cpu_topology()
+        if topology is None:
+            return
+        self.lists['Mapa de núcleos'].set_rows([
+            {'text': f"S{socket['id']} N{node['id']} C{core['id']}: {format_cpu_list(core['cpus'])}"}
+            for socket in topology['sockets']
+            for node in socket['nodes']
+            for core in node['cores']
+        ])
+
     def get_uptime_info(self):
         uptime_seconds = time.time() - psutil.boot_time()
         return str(timedelta(seconds=int(uptime_seconds)))
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Sysfo.py es un script suelto en la raíz del repositorio, no un paquete instalado
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _write_tree(root, files):
+    """Crea un árbol sysfs falso a partir de {ruta relativa: contenido}."""
+    for relative, content in files.items():
+        path = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f"{content}\n")
+
+
+@pytest.fixture
+def write_tree():
+    return _write_tree
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+import Sysfo
+
+
+def states(events):
+    return [(event.series, event.state) for event in events]
+
+
+def test_parse_alert_rule_defaults():
+    rule = Sysfo.parse_alert_rule('cpu_percent > 90 for 30s')
+    assert (rule.metric, rule.op, rule.threshold, rule.duration) == ('cpu_percent', '>', 90.0, 30.0)
+    assert rule.hysteresis == pytest.approx(1.8)
+    assert rule.cooldown == 300.0
+
+
+def test_parse_alert_rule_rejects_malformed_rule():
+    with pytest.raises(ValueError, match="Regla de alerta no válida"):
+        Sysfo.parse_alert_rule('cpu_percent >> 90')
+
+
+def test_fires_only_after_condition_holds_for_duration():
+    engine = Sysfo.AlertEngine(['cpu_percent > 90 for 30s'])
+    assert engine.evaluate({'cpu_percent': 95}, now=0) == []
+    assert engine.evaluate({'cpu_percent': 95}, now=20) == []
+    # Una muestra por debajo reinicia la cuenta
+    assert engine.evaluate({'cpu_percent': 50}, now=25) == []
+    assert engine.evaluate({'cpu_percent': 95}, now=30) == []
+    assert engine.evaluate({'cpu_percent': 95}, now=59) == []
+    assert states(engine.evaluate({'cpu_percent': 95}, now=60)) == [('cpu_percent', 'firing')]
+    # Mientras sigue activa no se repite
+    assert engine.evaluate({'cpu_percent': 99}, now=70) == []
+
+
+def test_hysteresis_keeps_alert_active_near_threshold():
+    engine = Sysfo.AlertEngine(['temp > 80 hysteresis 5 cooldown 0s'])
+    assert states(engine.evaluate({'temp': 81}, now=0)) == [('temp', 'firing')]
+    # Por debajo del umbral pero dentro de la histéresis: sigue activa
+    assert engine.evaluate({'temp': 77}, now=1) == []
+    assert states(engine.evaluate({'temp': 74}, now=2)) == [('temp', 'resolved')]
+
+
+def test_cooldown_suppresses_refiring():
+    engine = Sysfo.AlertEngine(['mem_percent > 90 hysteresis 0 cooldown 100s'])
+    assert states(engine.evaluate({'mem_percent': 95}, now=0)) == [('mem_percent', 'firing')]
+    assert states(engine.evaluate({'mem_percent': 50}, now=10)) == [('mem_percent', 'resolved')]
+    assert engine.evaluate({'mem_percent': 95}, now=20) == []
+    assert states(engine.evaluate({'mem_percent': 95}, now=100)) == [('mem_percent', 'firing')]
+
+
+def test_rule_applies_to_every_series_and_ignores_missing_metrics():
+    engine = Sysfo.AlertEngine(['disk_percent > 95 cooldown 0s', 'cpu_temp > 80'])
+    sample = {'disk_percent:/': 96, 'disk_percent:/home': 50, 'disk_percent_other': 99}
+    assert states(engine.evaluate(sample, now=0)) == [('disk_percent:/', 'firing')]
+    # Una serie nueva en la muestra recalcula el mapa de series
+    sample = dict(sample, **{'disk_percent:/data': 97})
+    assert states(engine.evaluate(sample, now=1)) == [('disk_percent:/data', 'firing')]
+
+
+def test_failing_sink_does_not_stop_evaluation():
+    received = []
+
+    def broken(event):
+        raise RuntimeError("sin conexión")
+
+    engine = Sysfo.AlertEngine(['cpu_percent > 90'], [broken, received.append])
+    engine.evaluate({'cpu_percent': 95}, now=0)
+    assert states(received) == [('cpu_percent', 'firing')]
+
+
+def test_rules_file_skips_indented_comments(tmp_path):
+    path = tmp_path / 'rules.txt'
+    path.write_text("# reglas\n  # desactivada: cpu_percent > 50\n\ncpu_percent > 90 for 60s\n", encoding='utf-8')
+    args = SimpleNamespace(rule=['mem_percent > 95'], rules_file=str(path))
+    assert Sysfo.load_alert_rules(args) == ['mem_percent > 95', 'cpu_percent > 90 for 60s']
+
+
+def test_read_only_mounts_do_not_track_usage():
+    assert Sysfo.tracks_disk_usage('ext4', 'rw,relatime')
+    assert not Sysfo.tracks_disk_usage('squashfs', 'ro,nodev')
+    assert not Sysfo.tracks_disk_usage('ext4', 'ro,relatime')
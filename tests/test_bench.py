@@ -0,0 +1,43 @@
+import Sysfo
+
+
+def bench_results(single=100.0, all_cores=400.0, cpus=4, copy=10.0, latency=100.0, memory_mb=256, duration=2):
+    return {
+        'date': '2026-01-01T00:00:00',
+        'cpu': [{'workers': 1, 'ops_per_sec': single}, {'workers': cpus, 'ops_per_sec': all_cores}],
+        'memory': {'buffer_mb': memory_mb, 'copy_gb_per_sec': copy, 'latency_ns': latency, 'latency_buffer_mb': 512},
+        'params': {'duration': duration, 'cpus': cpus, 'memory_mb': memory_mb, 'latency_buffer_mb': 512},
+    }
+
+
+def test_higher_latency_is_worse():
+    comparisons, skipped = Sysfo.compare_with_baseline(bench_results(latency=130.0), bench_results())
+    assert skipped == []
+    worse = {name: flag for name, _, _, _, flag in comparisons}
+    assert worse == {'Un núcleo (ops/s)': False, 'Todos los núcleos (ops/s)': False,
+                     'Copia de memoria (GB/s)': False, 'Latencia de memoria (ns)': True}
+
+
+def test_lower_throughput_is_worse_and_lower_latency_is_not():
+    comparisons, _ = Sysfo.compare_with_baseline(bench_results(copy=8.0, latency=70.0), bench_results())
+    worse = {name: flag for name, _, _, _, flag in comparisons}
+    assert worse['Copia de memoria (GB/s)'] is True
+    assert worse['Latencia de memoria (ns)'] is False
+
+
+def test_different_parameters_are_not_compared():
+    # Menos CPUs por la cuota del contenedor y buffers más pequeños
+    current = bench_results(all_cores=100.0, cpus=1, memory_mb=64)
+    comparisons, skipped = Sysfo.compare_with_baseline(current, bench_results())
+    assert [name for name, *_ in comparisons] == ['Un núcleo (ops/s)', 'Latencia de memoria (ns)']
+    assert [name for name, _ in skipped] == ['Todos los núcleos (ops/s)', 'Copia de memoria (GB/s)']
+
+
+def test_old_baseline_without_params_or_latency():
+    old = bench_results()
+    del old['params']
+    old['memory'] = {'buffer_mb': 256, 'copy_gb_per_sec': 10.0, 'random_read_ns': 3.0}
+    comparisons, skipped = Sysfo.compare_with_baseline(bench_results(), old)
+    # Sin la duración guardada solo es comparable la copia, cuyo tamaño sí consta
+    assert [name for name, *_ in comparisons] == ['Copia de memoria (GB/s)']
+    assert len(skipped) == 3
@@ -0,0 +1,81 @@
+import pytest
+
+import Sysfo
+
+
+def proc_cgroup(tmp_path, path):
+    proc = tmp_path / 'proc_cgroup'
+    proc.write_text(f"0::{path}\n")
+    return str(proc)
+
+
+@pytest.mark.parametrize('text, cpus', [
+    ('max 100000', None),
+    ('150000 100000', 1.5),
+    ('50000', 0.5),
+    ('', None),
+    (None, None),
+])
+def test_parse_cpu_max(text, cpus):
+    assert Sysfo.parse_cpu_max(text) == cpus
+
+
+def test_limits_keep_most_restrictive_ancestor(tmp_path, write_tree):
+    root = tmp_path / 'cgroup'
+    write_tree(root, {
+        'cgroup.controllers': 'cpuset cpu io memory pids',
+        'kube/cpu.max': '100000 100000',
+        'kube/memory.max': 8 * 1024 ** 3,
+        'kube/pod/cgroup.controllers': 'cpu io memory',
+        'kube/pod/cpu.max': '200000 100000',
+        'kube/pod/memory.max': 16 * 1024 ** 3,
+        'kube/pod/memory.current': 1024 ** 3,
+        'kube/pod/io.stat': '8:0 rbytes=1024 wbytes=2048 rios=1 wios=2\n8:16 rbytes=1024 wbytes=0 rios=1 wios=0',
+    })
+    limits = Sysfo.get_cgroup_limits(str(root), proc_cgroup(tmp_path, '/kube/pod'))
+    assert limits['path'] == str(root / 'kube' / 'pod')
+    assert limits['controllers'] == {'cpu', 'io', 'memory'}
+    # El padre limita más la CPU y la memoria que el propio pod
+    assert limits['cpu_limit'] == 1.0
+    assert limits['memory_max'] == 8 * 1024 ** 3
+    assert limits['memory_current'] == 1024 ** 3
+    assert limits['io'] == {'rbytes': 2048, 'wbytes': 2048, 'rios': 2, 'wios': 2}
+
+
+def test_unlimited_cgroup(tmp_path, write_tree):
+    root = tmp_path / 'cgroup'
+    write_tree(root, {
+        'cgroup.controllers': 'cpu memory',
+        'app/cgroup.controllers': 'cpu memory',
+        'app/cpu.max': 'max 100000',
+        'app/memory.max': 'max',
+    })
+    limits = Sysfo.get_cgroup_limits(str(root), proc_cgroup(tmp_path, '/app'))
+    assert limits['cpu_limit'] is None
+    assert limits['memory_max'] is None
+    info = Sysfo.get_container_info(str(root), proc_cgroup(tmp_path, '/app'))
+    assert "sin cuota de CPU" in info
+    assert "Memoria: sin límite en el cgroup" in info
+
+
+def test_hybrid_host_without_controllers_in_v2(tmp_path, write_tree):
+    # Modo híbrido: v2 en 'unified' con solo algunos controladores; cpu y
+    # memory siguen en v1, así que sus archivos no existen en v2
+    root = tmp_path / 'cgroup'
+    write_tree(root, {
+        'unified/cgroup.controllers': 'hugetlb',
+        'unified/cpu.max': '50000 100000',  # Ignorado: el controlador no está activo
+    })
+    limits = Sysfo.get_cgroup_limits(str(root), proc_cgroup(tmp_path, '/'))
+    assert limits['path'] == str(root / 'unified')
+    assert limits['cpu_limit'] is None
+    assert limits['memory_max'] is None
+    info = Sysfo.get_container_info(str(root), proc_cgroup(tmp_path, '/'))
+    assert "(controlador no disponible en cgroup v2)" in info
+    assert "Memoria: controlador no disponible en cgroup v2" in info
+    assert "sin límite" not in info and "sin cuota" not in info
+
+
+def test_without_cgroup_v2(tmp_path):
+    assert Sysfo.get_cgroup_limits(str(tmp_path), proc_cgroup(tmp_path, '/')) is None
+    assert Sysfo.get_container_info(str(tmp_path), proc_cgroup(tmp_path, '/')) == "cgroup v2 no disponible"
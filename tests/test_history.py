@@ -0,0 +1,60 @@
+import Sysfo
+
+
+def test_packed_blocks_round_trip(tmp_path):
+    conn = Sysfo.open_database(str(tmp_path / 'history.db'))
+    conn.execute("INSERT INTO metrics (id, name) VALUES (1, 'cpu_percent')")
+    rows = [(1, 1000.0 + i, float(i)) for i in range(1800)]
+    with conn:
+        conn.executemany("INSERT INTO samples (metric_id, ts, value) VALUES (?, ?, ?)", rows)
+    Sysfo.pack_samples(conn, now=2200)
+    # Los tramos cerrados pasan a bloques; el último (desde 1800) sigue en 'samples'
+    assert conn.execute("SELECT COUNT(*) FROM sample_blocks").fetchone()[0] == 2
+    assert conn.execute("SELECT MIN(ts) FROM samples").fetchone()[0] == 1800.0
+    assert Sysfo.query_range(conn, 'cpu_percent', 0, 5000, 'samples') == [row[1:] for row in rows]
+    assert Sysfo.query_range(conn, 'cpu_percent', 1100.5, 1900, 'samples') == [row[1:] for row in rows[101:900]]
+
+
+def test_late_samples_merge_into_existing_block(tmp_path):
+    conn = Sysfo.open_database(str(tmp_path / 'history.db'))
+    conn.execute("INSERT INTO metrics (id, name) VALUES (1, 'cpu_percent')")
+    with conn:
+        conn.executemany("INSERT INTO samples (metric_id, ts, value) VALUES (?, ?, ?)", [(1, 10.0, 1.0), (1, 30.0, 3.0)])
+    Sysfo.pack_samples(conn, now=700)
+    with conn:
+        conn.executemany("INSERT INTO samples (metric_id, ts, value) VALUES (?, ?, ?)", [(1, 20.0, 2.0), (1, 30.0, 4.0)])
+    Sysfo.pack_samples(conn, now=700)
+    assert Sysfo.query_range(conn, 'cpu_percent', 0, 600, 'samples') == [(10.0, 1.0), (20.0, 2.0), (30.0, 4.0)]
+
+
+def test_load_series_reads_blocks_and_pending_rows(tmp_path):
+    conn = Sysfo.open_database(str(tmp_path / 'history.db'))
+    conn.executemany("INSERT INTO metrics (id, name) VALUES (?, ?)", [(1, 'cpu_percent'), (2, 'mem_percent')])
+    with conn:
+        conn.executemany("INSERT INTO samples (metric_id, ts, value) VALUES (?, ?, ?)",
+                         [(metric, 500.0 + i, metric * 100 + i) for metric in (1, 2) for i in range(300)])
+    Sysfo.pack_samples(conn, now=650)
+    names, ids, ts, values, maxes = Sysfo.load_series(conn, ['*'], 550, 790, 'samples')
+    assert names == ['cpu_percent', 'mem_percent']
+    assert list(ids) == [0] * 240 + [1] * 240
+    assert list(ts[:3]) == [550.0, 551.0, 552.0] and ts[239] == 789.0
+    assert list(values[238:242]) == [388.0, 389.0, 250.0, 251.0]
+    assert maxes is values
+
+
+def test_packed_rollups_round_trip(tmp_path):
+    conn = Sysfo.open_database(str(tmp_path / 'history.db'))
+    conn.execute("INSERT INTO metrics (id, name) VALUES (1, 'cpu_percent')")
+    rows = [(1, 60 * i, i - 1.0, float(i), i + 1.0, 60) for i in range(720)]  # 12 h por minuto
+    with conn:
+        conn.executemany("INSERT INTO rollup_1m (metric_id, bucket, min, avg, max, count) VALUES (?, ?, ?, ?, ?, ?)",
+                         rows)
+    Sysfo.pack_rollups(conn, now=12 * 3600 + 30)
+    # Los dos tramos de 6 h cerrados pasan a bloques
+    assert conn.execute("SELECT COUNT(*) FROM rollup_1m").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM rollup_1m_blocks").fetchone()[0] == 2
+    assert Sysfo.query_range(conn, 'cpu_percent', 0, 12 * 3600, 'rollup_1m') == [row[1:] for row in rows]
+    names, ids, ts, values, maxes = Sysfo.load_series(conn, ['cpu_percent'], 3600, 7200, 'rollup_1m')
+    assert list(ts) == [60.0 * i for i in range(60, 120)]
+    assert list(values) == [float(i) for i in range(60, 120)]
+    assert list(maxes) == [i + 1.0 for i in range(60, 120)]
@@ -0,0 +1,98 @@
+import pytest
+
+import Sysfo
+
+
+def test_energy_delta_without_wraparound():
+    assert Sysfo.energy_delta(1000, 4000, 10 ** 6) == 3000
+
+
+def test_energy_delta_wraparound():
+    # El contador llega a max_range y vuelve a empezar desde cero
+    assert Sysfo.energy_delta(999_990, 5, 1_000_000) == 16
+
+
+def test_energy_delta_wraparound_without_range():
+    assert Sysfo.energy_delta(500, 100, None) is None
+
+
+def test_read_rapl_domains_names_subdomains_by_package(tmp_path, write_tree):
+    write_tree(tmp_path, {
+        'intel-rapl:0/name': 'package-0',
+        'intel-rapl:0/energy_uj': 100,
+        'intel-rapl:0/max_energy_range_uj': 262143328850,
+        'intel-rapl:0:0/name': 'core',
+        'intel-rapl:0:0/energy_uj': 40,
+        'intel-rapl:0:1/name': 'uncore',
+        'intel-rapl:0:1/energy_uj': 10,
+        'intel-rapl:1/name': 'package-1',
+        'intel-rapl:1/energy_uj': 200,
+        'intel-rapl:1:0/name': 'core',
+        'intel-rapl:1:0/energy_uj': 80,
+        'intel-rapl:2/name': 'psys',  # Sin energy_uj legible: se omite
+    })
+    domains = Sysfo.read_rapl_domains(str(tmp_path))
+    assert sorted(domains) == ['core:0', 'core:1', 'package-0', 'package-1', 'uncore:0']
+    assert domains['package-0'] == (100, 262143328850)
+    assert domains['core:1'] == (80, None)
+
+
+def test_read_batteries_converts_charge_to_energy(tmp_path, write_tree):
+    write_tree(tmp_path, {
+        'BAT0/type': 'Battery',
+        'BAT0/status': 'Discharging',
+        'BAT0/charge_now': 2_000_000,        # µAh
+        'BAT0/charge_full': 4_000_000,
+        'BAT0/charge_full_design': 5_000_000,
+        'BAT0/current_now': -1_500_000,      # µA, negativo al descargar en algunos equipos
+        'BAT0/voltage_now': 12_000_000,      # µV
+        'AC/type': 'Mains',
+    })
+    [battery] = Sysfo.read_batteries(str(tmp_path))
+    assert battery['energy_now'] == 24_000_000           # µWh
+    assert battery['energy_full'] == 48_000_000
+    assert battery['energy_full_design'] == 60_000_000
+    assert battery['power_now'] == 18_000_000             # µW
+
+
+def battery_tree(write_tree, root, **fields):
+    files = {'BAT0/type': 'Battery', 'BAT0/status': 'Discharging', 'BAT0/capacity': 80,
+             'BAT0/energy_full': 50_000_000, 'BAT0/energy_full_design': 62_500_000}
+    files.update({f'BAT0/{key}': value for key, value in fields.items()})
+    write_tree(root, files)
+
+
+def test_drain_rate_from_power_now(tmp_path, write_tree):
+    battery_tree(write_tree, tmp_path, power_now=10_000_000, energy_now=40_000_000)
+    monitor = Sysfo.PowerMonitor(str(tmp_path), str(tmp_path / 'powercap'))
+    metrics = monitor.sample(now=0)
+    # 10 W sobre 50 Wh de capacidad real: 20 % por hora
+    assert metrics['battery_watts:BAT0'] == 10.0
+    assert metrics['battery_drain_percent_per_hour:BAT0'] == 20.0
+    assert metrics['battery_health_percent:BAT0'] == 80.0
+
+
+def test_drain_rate_from_energy_delta(tmp_path, write_tree):
+    battery_tree(write_tree, tmp_path, energy_now=40_000_000)
+    monitor = Sysfo.PowerMonitor(str(tmp_path), str(tmp_path / 'powercap'))
+    assert 'battery_watts:BAT0' not in monitor.sample(now=0)
+    # 1 Wh en 360 s son 10 W
+    battery_tree(write_tree, tmp_path, energy_now=39_000_000)
+    metrics = monitor.sample(now=360)
+    assert metrics['battery_watts:BAT0'] == pytest.approx(10.0)
+    assert metrics['battery_drain_percent_per_hour:BAT0'] == pytest.approx(20.0)
+
+
+def test_drain_rate_skipped_below_update_period(tmp_path, write_tree):
+    battery_tree(write_tree, tmp_path, energy_now=40_000_000)
+    monitor = Sysfo.PowerMonitor(str(tmp_path), str(tmp_path / 'powercap'))
+    monitor.sample(now=0)
+    # energy_now todavía no se ha refrescado: no se informa de 0 W
+    metrics = monitor.sample(now=Sysfo.POWER_SUPPLY_MIN_INTERVAL / 10)
+    assert 'battery_watts:BAT0' not in metrics
+    assert 'battery_drain_percent_per_hour:BAT0' not in metrics
+    assert metrics['battery_percent:BAT0'] == 80
+    # La referencia se conserva hasta que pasa el periodo completo
+    battery_tree(write_tree, tmp_path, energy_now=39_900_000)
+    metrics = monitor.sample(now=36)
+    assert metrics['battery_watts:BAT0'] == pytest.approx(10.0)
@@ -0,0 +1,28 @@
+import Sysfo
+
+TOPOLOGY = {'sockets': [{'id': 0, 'nodes': [{'id': 0, 'cores': [
+    {'id': 0, 'cpus': [0, 2]},
+    {'id': 4, 'cpus': [1, 3]},
+]}]}]}
+
+
+def test_package_and_hottest_ignore_other_chips():
+    readings = {'coretemp.Package id 0': 55.0, 'coretemp.Core 0': 50.0, 'coretemp.Core 4': 61.0,
+                'nvme.Composite': 70.0}
+    assert Sysfo.get_cpu_package_temperature(readings) == 55.0
+    assert Sysfo.get_cpu_temperature(readings) == 61.0
+
+
+def test_amd_package_sensor():
+    assert Sysfo.get_cpu_package_temperature({'k10temp.Tctl': 66.0, 'k10temp.Tccd1': 60.0}) == 66.0
+
+
+def test_core_temperatures_follow_physical_core_id():
+    readings = {'coretemp.Core 0': 50.0, 'coretemp.Core 4': 61.0}
+    # core_id no tiene por qué ser consecutivo; los hilos SMT comparten la lectura
+    assert Sysfo.get_core_temperatures(readings, TOPOLOGY) == {0: 50.0, 2: 50.0, 1: 61.0, 3: 61.0}
+
+
+def test_core_temperatures_without_per_core_sensors():
+    assert Sysfo.get_core_temperatures({'k10temp.Tctl': 66.0}, TOPOLOGY) == {}
+    assert Sysfo.get_core_temperatures({'coretemp.Core 0': 50.0}, None) == {}